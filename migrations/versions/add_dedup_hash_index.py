@@ -0,0 +1,26 @@
+"""Index ScrapeJob.dedup_hash for duplicate-submission lookups
+
+Revision ID: add_dedup_hash_index
+Revises: add_scrape_job_fields
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_dedup_hash_index'
+down_revision = 'add_scrape_job_fields'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('scrape_job', schema=None) as batch_op:
+        batch_op.create_index('ix_scrape_job_dedup_hash_created_at', ['dedup_hash', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scrape_job', schema=None) as batch_op:
+        batch_op.drop_index('ix_scrape_job_dedup_hash_created_at')
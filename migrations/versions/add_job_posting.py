@@ -0,0 +1,58 @@
+"""Normalized job_posting table joined to scrape_job
+
+Revision ID: add_job_posting
+Revises: add_dedup_hash_index
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_job_posting'
+down_revision = 'add_dedup_hash_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_posting',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url_hash', sa.String(length=64), nullable=False),
+    sa.Column('url', sa.String(length=1024), nullable=True),
+    sa.Column('source', sa.String(length=64), nullable=True),
+    sa.Column('title', sa.String(length=256), nullable=True),
+    sa.Column('company', sa.String(length=256), nullable=True),
+    sa.Column('location', sa.String(length=256), nullable=True),
+    sa.Column('salary', sa.String(length=128), nullable=True),
+    sa.Column('experience', sa.String(length=128), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('skills', sa.String(length=512), nullable=True),
+    sa.Column('first_seen_at', sa.DateTime(), nullable=True),
+    sa.Column('last_seen_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('url_hash')
+    )
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_job_posting_last_seen_at'), ['last_seen_at'], unique=False)
+
+    op.create_table('scrape_job_posting',
+    sa.Column('scrape_job_id', sa.Integer(), nullable=False),
+    sa.Column('job_posting_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['job_posting_id'], ['job_posting.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['scrape_job_id'], ['scrape_job.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('scrape_job_id', 'job_posting_id')
+    )
+    with op.batch_alter_table('scrape_job_posting', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_scrape_job_posting_job_posting_id'), ['job_posting_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scrape_job_posting', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_scrape_job_posting_job_posting_id'))
+    op.drop_table('scrape_job_posting')
+
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_job_posting_last_seen_at'))
+    op.drop_table('job_posting')
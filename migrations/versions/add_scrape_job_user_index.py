@@ -0,0 +1,26 @@
+"""Index ScrapeJob (user_id, created_at) for monthly quota counts
+
+Revision ID: add_scrape_job_user_index
+Revises: add_job_posting
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_scrape_job_user_index'
+down_revision = 'add_job_posting'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('scrape_job', schema=None) as batch_op:
+        batch_op.create_index('ix_scrape_job_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('scrape_job', schema=None) as batch_op:
+        batch_op.drop_index('ix_scrape_job_user_id_created_at')
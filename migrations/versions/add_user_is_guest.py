@@ -0,0 +1,30 @@
+"""Flag guest users and index them for the periodic purge
+
+Revision ID: add_user_is_guest
+Revises: add_scrape_job_user_index
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_is_guest'
+down_revision = 'add_scrape_job_user_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_guest', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.create_index('ix_user_is_guest_created_at', ['is_guest', 'created_at'], unique=False)
+    # existing per-upload guest rows
+    op.execute("UPDATE \"user\" SET is_guest = true WHERE email LIKE '%@guest.local'")
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_is_guest_created_at')
+        batch_op.drop_column('is_guest')
@@ -0,0 +1,117 @@
+"""
+Concurrency benchmark for ScrapeJob writes.
+
+Starts several processes that each create the app against the same
+database and run the write pattern of the web and worker services: insert
+a ScrapeJob, then update its progress a few times, one commit each.
+Reports throughput and how many transactions failed with
+"database is locked".
+
+    python scripts/bench_db_writes.py [--processes 6] [--jobs 100] [--database-url sqlite:///bench.db]
+    python scripts/bench_db_writes.py --baseline   # rollback journal, synchronous=FULL, 5s timeout
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# sqlite3 defaults before the engine configuration layer
+BASELINE_ENV = {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_BUSY_TIMEOUT_MS': '5000'}
+
+
+def make_app(database_url):
+    sys.path.insert(0, SRC)
+    from app import create_app
+
+    class BenchConfig:
+        SECRET_KEY = 'bench'
+        SQLALCHEMY_DATABASE_URI = database_url
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        UPLOAD_FOLDER = os.path.join(tempfile.gettempdir(), 'bench-uploads')
+        OUTPUT_FOLDER = os.path.join(tempfile.gettempdir(), 'bench-outputs')
+        CELERY_BROKER_URL = 'memory://'
+        CELERY_RESULT_BACKEND = 'cache+memory://'
+        RATELIMIT_ENABLED = False
+
+    return create_app(BenchConfig)
+
+
+def worker(database_url, jobs, updates, start, results):
+    from app import db
+    from app.models import ScrapeJob
+
+    app = make_app(database_url)
+    ok = locked = 0
+    latencies = []
+    with app.app_context():
+        start.wait()
+        for _ in range(jobs):
+            for step in range(updates + 1):
+                began = time.perf_counter()
+                try:
+                    if step == 0:
+                        job = ScrapeJob(user_id=1, job_titles='python developer', location='Pune', status='queued')
+                        db.session.add(job)
+                    else:
+                        job.status = 'completed' if step == updates else 'running'
+                        job.progress = step * 100 // updates
+                    db.session.commit()
+                    ok += 1
+                except Exception as exc:
+                    db.session.rollback()
+                    if 'locked' not in str(exc):
+                        raise
+                    locked += 1
+                    if step == 0:
+                        break
+                latencies.append(time.perf_counter() - began)
+    results.put((ok, locked, latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=6)
+    parser.add_argument('--jobs', type=int, default=100, help='ScrapeJobs created per process')
+    parser.add_argument('--updates', type=int, default=3, help='progress updates per job')
+    parser.add_argument('--database-url', help='defaults to a fresh SQLite file in a temp dir')
+    parser.add_argument('--baseline', action='store_true', help='SQLite without WAL/busy_timeout tuning')
+    args = parser.parse_args()
+
+    if args.baseline:
+        os.environ.update(BASELINE_ENV)
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+    from app import db
+    with make_app(database_url).app_context():
+        db.create_all()
+
+    ctx = multiprocessing.get_context('spawn')
+    start, results = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(database_url, args.jobs, args.updates, start, results))
+             for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    time.sleep(2)  # let every process import and connect before the clock starts
+    began = time.perf_counter()
+    start.set()
+    outcomes = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - began
+    for p in procs:
+        p.join()
+
+    ok = sum(o[0] for o in outcomes)
+    locked = sum(o[1] for o in outcomes)
+    latencies = sorted(l for o in outcomes for l in o[2])
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    mode = 'baseline' if args.baseline else 'tuned'
+    print(f"{mode}: {args.processes} processes, {ok} commits in {elapsed:.2f}s "
+          f"({ok / elapsed:.0f}/s), {locked} 'database is locked', p99 commit {p99:.1f} ms")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, SRC)
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark for the JSON codec (src/app/codec.py) against stdlib json.
+
+Encodes and decodes realistic job-list payloads: a full results document,
+the NDJSON lines written by scrape tasks, and a Celery task message.
+
+    python scripts/bench_json.py [--jobs 500] [--repeat 20]
+"""
+import os
+import sys
+import json
+import random
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from app import codec  # noqa: E402
+from app.skills import SKILLS  # noqa: E402
+
+WORDS = ("build", "scalable", "services", "with", "python", "team", "cloud", "data", "pipelines", "design",
+         "apis", "mentor", "engineers", "customers", "production", "reliability", "ownership", "fast-paced")
+
+
+def make_jobs(n, seed=7):
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(n):
+        skills = rng.sample(SKILLS, 6)
+        jobs.append({
+            "id": f"naukri-{i}",
+            "title": rng.choice(("Senior Backend Engineer", "Data Engineer", "Full Stack Developer",
+                                 "DevOps Engineer", "Machine Learning Engineer")),
+            "company": f"Company {i % 97}",
+            "location": rng.choice(("Bangalore", "Pune", "Hyderabad", "Remote")),
+            "description": " ".join(rng.choice(WORDS + tuple(skills)) for _ in range(120)),
+            "salary": f"{rng.randint(8, 40)}-{rng.randint(41, 80)} LPA",
+            "job_type": "Full-time",
+            "experience": f"{rng.randint(1, 5)}-{rng.randint(6, 12)} years",
+            "url": f"https://www.naukri.com/job-listings-{i}",
+            "posted": "2 days ago",
+            "skills": skills,
+            "score": round(rng.uniform(20, 95), 1),
+            "matching_skills": skills[:3],
+            "gaps": skills[3:],
+        })
+    return jobs
+
+
+def stdlib_dumps(obj):
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def bench(label, fn, repeat):
+    seconds = min(timeit.repeat(fn, number=1, repeat=repeat))
+    return label, seconds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.jobs)
+    document = {"jobs": jobs, "cursor": 123456, "done": True, "status": "completed", "matching": "ok"}
+    encoded = stdlib_dumps(document)
+    lines = [stdlib_dumps(j) for j in jobs]
+    message = [[42, "python developer", "Pune", "ab" * 32], {"resume": {"skills": list(SKILLS[:12])}}, {}]
+
+    cases = [
+        ("results document dumps", lambda: stdlib_dumps(document), lambda: codec.dumps(document)),
+        ("results document loads", lambda: json.loads(encoded), lambda: codec.loads(encoded)),
+        ("ndjson append (per line)", lambda: b"".join(stdlib_dumps(j) + b"\n" for j in jobs),
+         lambda: b"".join(codec.dumps(j) + b"\n" for j in jobs)),
+        ("ndjson read (per line)", lambda: [json.loads(x) for x in lines], lambda: [codec.loads(x) for x in lines]),
+        ("task message x1000", lambda: [json.dumps(message) for _ in range(1000)],
+         lambda: [codec.dumps_str(message) for _ in range(1000)]),
+    ]
+
+    print(f"codec backend: {codec.BACKEND}; {args.jobs} jobs, {len(encoded) / 1024:.0f} KiB document, "
+          f"best of {args.repeat}")
+    print(f"{'case':<28}{'stdlib ms':>12}{'codec ms':>12}{'speedup':>10}")
+    for label, baseline, candidate in cases:
+        _, base_ms = bench(label, baseline, args.repeat)
+        _, codec_ms = bench(label, candidate, args.repeat)
+        print(f"{label:<28}{base_ms:>12.2f}{codec_ms:>12.2f}{base_ms / codec_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
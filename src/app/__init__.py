@@ -1,6 +1,7 @@
 # src/app/__init__.py
 import os
 import logging
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -21,6 +22,26 @@ login_manager = LoginManager()
 
 LOG = logging.getLogger(__name__)
 
+def _configure_sqlite(app):
+    """Apply the SQLite pragmas (WAL, synchronous, busy_timeout) to every new connection."""
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+    from sqlalchemy import event
+    from .config import sqlite_pragmas
+
+    pragmas = sqlite_pragmas(app.config)
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        event.listen(db.engine, 'connect', on_connect)
+
 def create_app(config_object=None):
     app = Flask(__name__, static_folder='../static', template_folder='../templates')
     if config_object:
@@ -29,8 +50,15 @@ def create_app(config_object=None):
         from .config import BaseConfig
         app.config.from_object(BaseConfig)
 
+    # JSON responses go through the fast codec (orjson when installed)
+    from .codec import JSONProvider
+    app.json = JSONProvider(app)
+
     # initialize extensions
+    from .config import engine_options
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
     db.init_app(app)
+    _configure_sqlite(app)
     migrate.init_app(app, db)
     mail.init_app(app)
     limiter.init_app(app)
@@ -60,6 +88,14 @@ def create_app(config_object=None):
     app.register_blueprint(api_bp)
     app.register_blueprint(auth_bp)
 
+    @app.cli.command('sweep-retention')
+    @click.option('--dry-run', is_flag=True, help='Only report what would be deleted.')
+    def sweep_retention_command(dry_run):
+        """Delete resumes and result files past their retention now."""
+        from .retention import sweep_all
+        for kind, stats in sweep_all(dry_run=dry_run).items():
+            click.echo(f"{kind}: {stats}")
+
     # Configure Celery (init without causing circular import)
     try:
         from .tasks import init_celery
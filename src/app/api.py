@@ -1,12 +1,22 @@
 # src/app/api.py
 import os
-import json
+import time
+import gzip
+import hashlib
 import logging
-from flask import Blueprint, render_template, request, current_app, jsonify, send_file, url_for
+from datetime import datetime, timedelta
+from flask import Blueprint, render_template, request, current_app, jsonify, send_file, url_for, Response, stream_with_context
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 from .utils import encrypt_key, decrypt_key
-from .models import User, ScrapeJob
+from .models import ScrapeJob, RoleEnum
+from .results import (read_jobs, read_raw, dedupe_postings, load_matches, apply_matches, load_profile_skills,
+                      final_results_path, compress, write_compressed, read_compressed)
+from .events import subscribe, sse, public, TERMINAL_STATUSES
+from .progress import get_state, set_state
+from .resume_store import store_upload, relative_path, ResumeTooLarge
+from .skills import SkillIndex
+from .guests import guest_user_id, touch_guest
+from . import codec, quota
 from . import db
 from flask_limiter import Limiter
 
@@ -15,9 +25,36 @@ bp = Blueprint('api', __name__)
 
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt'}
 
+# NDJSON results streaming: how often to check for new postings, and when to give up
+RESULTS_STREAM_POLL_SECONDS = 0.5
+RESULTS_STREAM_MAX_SECONDS = 300
+
+# SSE progress stream: keepalive interval, max connection lifetime (browser reconnects), reconnect delay
+EVENTS_KEEPALIVE_SECONDS = 15
+EVENTS_MAX_SECONDS = 600
+EVENTS_RETRY_MS = 2000
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _has_results(scrape_job):
+    path = scrape_job.results_path
+    return bool(path and os.path.exists(path) and os.path.getsize(path) > 0)
+
+def find_recent_duplicate(dedup_hash, user_id):
+    """The user's most recent queued/running/completed job with this hash inside DEDUP_WINDOW_SECONDS."""
+    window = current_app.config.get('DEDUP_WINDOW_SECONDS', 3600)
+    if not window:
+        return None
+    since = datetime.utcnow() - timedelta(seconds=window)
+    return (ScrapeJob.query
+            .filter(ScrapeJob.dedup_hash == dedup_hash,
+                    ScrapeJob.user_id == user_id,
+                    ScrapeJob.created_at >= since,
+                    ScrapeJob.status.in_(('queued', 'running', 'completed')))
+            .order_by(ScrapeJob.created_at.desc())
+            .first())
+
 # ==================== FLOW ROUTES ====================
 
 @bp.route('/', methods=['GET'])
@@ -53,22 +90,6 @@ def upload_and_queue():
     Upload resume and queue scraping task.
     Accepts both authenticated users and guests.
     """
-    # Get or create guest user
-    user_id = None
-    if current_user.is_authenticated:
-        user_id = current_user.id
-    else:
-        # Create temporary guest user
-        import uuid
-        guest_session = str(uuid.uuid4())
-        guest_email = f"{guest_session}@guest.local"
-        user = User.query.filter_by(email=guest_email).first()
-        if not user:
-            user = User(email=guest_email)
-            db.session.add(user)
-            db.session.commit()
-        user_id = user.id
-
     if 'resume' not in request.files:
         return jsonify({'error': 'no file'}), 400
     f = request.files['resume']
@@ -77,40 +98,71 @@ def upload_and_queue():
     if not allowed_file(f.filename):
         return jsonify({'error': 'file type not allowed'}), 400
 
-    raw = f.read()
-    if len(raw) > current_app.config['MAX_CONTENT_LENGTH']:
-        return jsonify({'error': 'file too large'}), 413
+    # Signed-in user, or this browser session's guest (created on its first upload)
+    if current_user.is_authenticated:
+        user_id, role = current_user.id, current_user.role
+    else:
+        user_id, role = guest_user_id(), RoleEnum.FREE
 
-    # Save resume
-    filename = secure_filename(f.filename)
-    timestamp = int(__import__('time').time())
-    filename_unique = f"{timestamp}_{filename}"
-    upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename_unique)
-    with open(upload_path, 'wb') as fh:
-        fh.write(raw)
+    # Monthly quota: one Redis round trip, before touching the disk or creating the job
+    try:
+        reserved = quota.reserve(user_id, role)
+    except quota.QuotaExceeded as e:
+        return jsonify({'error': 'monthly quota exceeded', 'limit': e.limit,
+                        'resets_at': e.resets_at.isoformat() + 'Z'}), 429
+
+    # Anything that fails past this point gives the slot back; only a created job keeps it
+    try:
+        response, created = _store_and_queue(f, user_id)
+    except Exception:
+        if reserved:
+            quota.release(user_id)
+        raise
+    if reserved and not created:
+        quota.release(user_id)
+    return response
+
+def _store_and_queue(f, user_id):
+    """Store the upload and queue its job, or attach to a duplicate. Returns (response, created)."""
+    # Stream into the content-addressed store, hashing as we go
+    ext = f.filename.rsplit('.', 1)[1].lower()
+    try:
+        resume = store_upload(f.stream, ext, current_app.config['UPLOAD_FOLDER'],
+                              current_app.config['MAX_CONTENT_LENGTH'])
+    except ResumeTooLarge:
+        return (jsonify({'error': 'file too large'}), 413), False
 
-    # Create ScrapeJob record
     job_titles = request.form.get('job_titles', 'developer')
     location = request.form.get('location', 'india')
     years_of_experience = request.form.get('years_of_experience', type=int)
     skills = request.form.get('skills', '')
 
-    from .utils import hash_file_bytes
-    dedup_hash = hash_file_bytes(raw + f"{job_titles}:{location}".encode())
+    # Every form field that reaches matching is part of the key
+    dedup_hash = resume.hash_with(f"{job_titles}:{location}:{years_of_experience or ''}:{skills}".encode())
+
+    # Same user, resume and query submitted recently: attach to that job instead of re-scraping
+    existing = find_recent_duplicate(dedup_hash, user_id)
+    if existing:
+        LOG.info("Duplicate submission, reusing ScrapeJob %s", existing.id)
+        return (jsonify({'task_id': existing.id, 'deduplicated': True}), 202), False
 
+    # Create ScrapeJob record
     scrape_job = ScrapeJob(
         user_id=user_id,
         job_titles=job_titles,
         location=location,
         years_of_experience=years_of_experience,
         skills=skills,
-        resume_filename=filename_unique,
+        resume_filename=relative_path(resume.digest, ext),
         status='queued',
         progress=0,
         dedup_hash=dedup_hash
     )
     db.session.add(scrape_job)
     db.session.commit()
+    if not current_user.is_authenticated:
+        touch_guest(user_id)
+    set_state(scrape_job.id, status='queued', progress=0)
 
     # Queue Celery task
     from .tasks import async_scrape_and_match
@@ -119,46 +171,216 @@ def upload_and_queue():
         user_id,
         job_titles,
         location,
-        raw,
-        upload_path
+        resume.digest,
+        resume.path
     ])
 
     LOG.info(f"Task queued: {task.id} for ScrapeJob {scrape_job.id}")
-    return jsonify({'task_id': scrape_job.id}), 202
+    return (jsonify({'task_id': scrape_job.id}), 202), True
+
+def _job_state(task_id):
+    """Live status of a job: Redis hot state first, the ScrapeJob row as fallback. None if unknown."""
+    state = get_state(task_id)
+    if state:
+        return state
+    scrape_job = ScrapeJob.query.get(task_id)
+    if not scrape_job:
+        return None
+    return {
+        'status': scrape_job.status,
+        'progress': scrape_job.progress,
+        'has_results': _has_results(scrape_job),
+        'results_path': scrape_job.results_path,
+    }
 
 @bp.route('/task/<int:task_id>/status', methods=['GET'])
 def task_status(task_id):
     """Get task status and progress from Redis"""
-    scrape_job = ScrapeJob.query.get(task_id)
-    if not scrape_job:
+    state = _job_state(task_id)
+    if not state:
         return jsonify({'error': 'task not found'}), 404
 
     return jsonify({
-        'status': scrape_job.status,
-        'progress': scrape_job.progress,
-        'message': f'{scrape_job.status}...'
+        'status': state['status'],
+        'progress': state['progress'],
+        'message': state.get('message') or f"{state['status']}...",
+        'has_results': state['has_results'],
     }), 200
 
+@bp.route('/task/<int:task_id>/events', methods=['GET'])
+def task_events(task_id):
+    """
+    Server-Sent Events stream of a job's progress, fed by Redis pub/sub.
+
+    Responds 503 when Redis isn't configured so the page falls back to
+    polling /task/<id>/status. State is read once per connection.
+    """
+    pubsub = subscribe(task_id)
+    if pubsub is None:
+        return jsonify({'error': 'events unavailable'}), 503
+
+    # subscribe before reading the state so no update can fall between the two
+    state = _job_state(task_id)
+    if not state:
+        pubsub.close()
+        return jsonify({'error': 'task not found'}), 404
+    initial = public(state)
+    db.session.remove()  # don't hold a DB connection for the lifetime of the stream
+
+    def generate():
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n"
+            yield sse(initial)
+            if initial['status'] in TERMINAL_STATUSES:
+                return
+            deadline = time.monotonic() + EVENTS_MAX_SECONDS
+            while time.monotonic() < deadline:
+                message = pubsub.get_message(timeout=EVENTS_KEEPALIVE_SECONDS)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                payload = codec.loads(message['data'])
+                yield sse(payload)
+                if payload.get('status') in TERMINAL_STATUSES:
+                    return
+        finally:
+            pubsub.close()
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
 @bp.route('/task/<int:task_id>/results', methods=['GET'])
 def task_results(task_id):
-    """Get task results (jobs list)"""
-    scrape_job = ScrapeJob.query.get(task_id)
-    if not scrape_job:
+    """
+    Get task results (jobs list).
+
+    Postings are readable while the scrape is still running:
+      ?cursor=<n>  returns the postings after byte offset n plus the next cursor
+      ?stream=1    (or Accept: application/x-ndjson) streams NDJSON until the job finishes,
+                   starting at ?cursor if given
+    Without either, the full list is returned once the job has completed.
+
+    Bodies carry a strong ETag and are gzip-encoded when the client accepts
+    it. Once the job is completed and matched, the full document (also what
+    ?cursor=0 returns) is encoded once and served from disk from then on.
+    """
+    state = _job_state(task_id)
+    if not state:
         return jsonify({'error': 'task not found'}), 404
 
-    if scrape_job.status != 'completed':
-        return jsonify({'error': 'task not completed yet', 'status': scrape_job.status}), 202
+    status = state['status']
+    path = state.get('results_path')
+    cursor = request.args.get('cursor', type=int)
+    if cursor is not None and not _valid_cursor(path, cursor):
+        return jsonify({'error': 'invalid cursor'}), 400
 
-    if scrape_job.results_path and os.path.exists(scrape_job.results_path):
-        try:
-            with open(scrape_job.results_path, 'r') as f:
-                data = json.load(f)
-                return jsonify(data), 200
-        except Exception as e:
-            LOG.error(f"Error reading results: {e}")
-            return jsonify({'error': 'failed to read results'}), 500
-    
-    return jsonify({'error': 'no results'}), 404
+    wants_stream = request.args.get('stream') or request.accept_mimetypes.best == 'application/x-ndjson'
+    if wants_stream:
+        return Response(stream_with_context(_stream_results(task_id, cursor or 0)), mimetype='application/x-ndjson')
+    if cursor is None and status != 'completed':
+        return jsonify({'error': 'task not completed yet', 'status': status}), 202
+
+    final = status == 'completed' and not cursor
+    if final:
+        cached = read_compressed(final_results_path(task_id))
+        if cached is not None:
+            return _send_encoded(cached)
+
+    if not path:
+        if cursor is not None and status in ('queued', 'running'):
+            return jsonify({'jobs': [], 'cursor': 0, 'done': False, 'status': status}), 200
+        return jsonify({'error': 'no results'}), 404
+
+    try:
+        jobs, next_cursor = read_jobs(path, cursor or 0)
+    except Exception as e:
+        LOG.error(f"Error reading results: {e}")
+        return jsonify({'error': 'failed to read results'}), 500
+
+    # cursor polls are answered from the hot state; only the full document reads the row
+    scrape_job = None
+    if final:
+        scrape_job = ScrapeJob.query.get(task_id)
+        if not scrape_job:  # purged while its hot state was still around
+            return jsonify({'error': 'task not found'}), 404
+        jobs = dedupe_postings(jobs)
+    matches = load_matches(task_id)
+    apply_matches(jobs, matches)
+    resume_skills = state.get('skills')
+    resume_skills = resume_skills.split(",") if resume_skills else load_profile_skills(task_id)
+    if resume_skills is None and scrape_job:  # completed before the merged skills were kept
+        resume_skills = (scrape_job.skills or "").split(",")
+    resume_skills = resume_skills or []
+    index = _annotate_skills(jobs, resume_skills)
+
+    body = {
+        'jobs': jobs,
+        'cursor': next_cursor,
+        'done': status in TERMINAL_STATUSES,
+        'status': status,
+        # a failed scrape is never matched, so the page stops waiting for scores
+        'matching': matches['status'] if matches else ('skipped' if status == 'failed' else 'pending'),
+    }
+    if final:
+        body['query'] = scrape_job.job_titles
+        body['location'] = scrape_job.location
+        body['skill_gaps'] = index.top_gaps(resume_skills)
+
+    raw = codec.dumps(body)
+    encoded = compress(raw)
+    if final and matches is not None:
+        write_compressed(final_results_path(task_id), encoded)
+    return _send_encoded(encoded, raw)
+
+def _valid_cursor(path, cursor):
+    """A cursor is a byte offset into the postings stream: never negative or past its end."""
+    try:
+        size = os.path.getsize(path) if path else 0
+    except OSError:
+        size = 0
+    return 0 <= cursor <= size
+
+def _send_encoded(encoded, raw=None):
+    """
+    Send a gzip-encoded JSON body as is (or decoded for clients that don't
+    accept gzip), with a strong ETag per encoding and 304 on a match.
+    """
+    tag = hashlib.sha256(encoded).hexdigest()[:32]
+    use_gzip = request.accept_encodings['gzip'] > 0
+    etag = tag if use_gzip else f"{tag}-identity"
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(encoded if use_gzip else (raw or gzip.decompress(encoded)), mimetype='application/json')
+        if use_gzip:
+            resp.headers['Content-Encoding'] = 'gzip'
+    resp.set_etag(etag)
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['Cache-Control'] = 'no-cache'  # always revalidate; unchanged bodies come back as 304
+    return resp
+
+def _annotate_skills(jobs, resume_skills):
+    """Fill in matching skills and gaps per posting from the skill index (no LLM needed)."""
+    index = SkillIndex.from_jobs(jobs)
+    for job, (matching, gaps) in zip(jobs, index.compare(resume_skills)):
+        job.setdefault('matching_skills', matching)
+        job.setdefault('gaps', gaps)
+    return index
+
+def _stream_results(task_id, cursor=0):
+    deadline = time.monotonic() + RESULTS_STREAM_MAX_SECONDS
+    while True:
+        db.session.expire_all()
+        state = _job_state(task_id)
+        done = state is None or state['status'] in TERMINAL_STATUSES
+        path = state.get('results_path') if state else None
+        if path:
+            chunk, cursor = read_raw(path, cursor)
+            if chunk:
+                yield chunk
+        if done or time.monotonic() > deadline:
+            return
+        time.sleep(RESULTS_STREAM_POLL_SECONDS)
 
 @bp.route('/job/<int:job_id>', methods=['GET'])
 @login_required
@@ -198,6 +420,10 @@ def proxy_openai_match():
     if current_user.is_authenticated and job.user_id != current_user.id:
         return jsonify({'error': 'unauthorized'}), 403
     
-    # For now, return pending status
-    # In production, query the match_jobs_with_gpt task result from Celery
-    return jsonify({'status': 'pending', 'message': 'matching in progress'}), 202
+    # Served from the stored outcome; never re-runs matching or reads the Celery backend
+    matches = load_matches(job.id)
+    if matches is None:
+        if job.status == 'failed':
+            return jsonify({'status': 'failed', 'message': 'scrape failed, nothing to match'}), 409
+        return jsonify({'status': 'pending', 'message': 'matching in progress'}), 202
+    return jsonify(matches), 200
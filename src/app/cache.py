@@ -0,0 +1,255 @@
+"""
+Shared TTL cache for JSON-serializable values.
+
+Entries live in Redis (REDIS_URL) so every web and worker process sees the
+same cache; when Redis is not configured or unreachable they fall back to
+one file per key under CACHE_FOLDER. Both backends evict the oldest
+entries once a namespace grows past `max_bytes`; on Redis the size
+bookkeeping and eviction run in one Lua script per write.
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from flask import current_app, has_app_context
+
+from . import codec
+from .utils import atomic_write, get_redis
+
+LOG = logging.getLogger(__name__)
+
+
+def cache_folder():
+    if has_app_context():
+        return current_app.config.get('CACHE_FOLDER', 'cache')
+    return os.getenv('CACHE_FOLDER', 'cache')
+
+def cache_setting(name, default):
+    """Integer cache setting from the app config, else the environment."""
+    if has_app_context() and name in current_app.config:
+        return int(current_app.config[name])
+    return int(os.getenv(name, str(default)))
+
+def normalize_text(value):
+    """Lower-case and collapse whitespace so equivalent queries share a key."""
+    return " ".join(str(value or "").lower().split())
+
+
+# KEYS: entry, index (zset name -> write time), sizes (hash name -> bytes), running byte total
+# ARGV: value, ttl, now, max_bytes. Returns the namespace's size after eviction.
+SET_SCRIPT = """
+local name, index, sizes, total = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local raw, ttl, now, max_bytes = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+if redis.call('EXISTS', total) == 0 then
+  local sum = 0
+  for _, size in ipairs(redis.call('HVALS', sizes)) do sum = sum + tonumber(size) end
+  redis.call('SET', total, sum)
+end
+local old = tonumber(redis.call('HGET', sizes, name) or 0)
+redis.call('SET', name, raw, 'EX', ttl)
+redis.call('ZADD', index, now, name)
+redis.call('HSET', sizes, name, #raw)
+local used = redis.call('INCRBY', total, #raw - old)
+
+local function forget(victim)
+  used = redis.call('DECRBY', total, tonumber(redis.call('HGET', sizes, victim) or 0))
+  redis.call('HDEL', sizes, victim)
+end
+for _, victim in ipairs(redis.call('ZRANGEBYSCORE', index, '-inf', now - ttl, 'LIMIT', 0, 100)) do
+  redis.call('ZREM', index, victim)
+  forget(victim)
+end
+while used > max_bytes do
+  local oldest = redis.call('ZPOPMIN', index)
+  if #oldest == 0 then break end
+  redis.call('DEL', oldest[1])
+  forget(oldest[1])
+end
+return used
+"""
+
+_set_script_obj = None
+
+def _set_script(r):
+    global _set_script_obj
+    if _set_script_obj is None:
+        _set_script_obj = r.register_script(SET_SCRIPT)
+    return _set_script_obj
+
+
+class TTLCache:
+    def __init__(self, namespace, ttl, max_bytes, redis_url=None, cache_dir=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._redis_url = redis_url
+        self._cache_dir = cache_dir
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+    @property
+    def _dir(self):
+        return Path(self._cache_dir or cache_folder()) / self.namespace
+
+    def _digest(self, key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        value = None
+        r = get_redis(self._redis_url)
+        if r is not None:
+            try:
+                raw = r.get(f"{self.namespace}:{self._digest(key)}")
+                value = codec.loads(raw) if raw is not None else None
+                self._count(value is not None)
+                return value
+            except Exception as e:
+                LOG.warning("Redis cache read failed, using disk: %s", e)
+        value = self._disk_get(key)
+        self._count(value is not None)
+        return value
+
+    def get_many(self, keys):
+        """Values for `keys` in order (None for misses), in one round trip on Redis."""
+        keys = list(keys)
+        if not keys:
+            return []
+        r = get_redis(self._redis_url)
+        values = None
+        if r is not None:
+            try:
+                raws = r.mget([f"{self.namespace}:{self._digest(k)}" for k in keys])
+                values = [codec.loads(raw) if raw is not None else None for raw in raws]
+            except Exception as e:
+                LOG.warning("Redis cache read failed, using disk: %s", e)
+        if values is None:
+            values = [self._disk_get(k) for k in keys]
+        hits = sum(v is not None for v in values)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(values) - hits
+        return values
+
+    def set(self, key, value):
+        raw = codec.dumps_str(value)
+        r = get_redis(self._redis_url)
+        if r is not None:
+            try:
+                self._redis_set(r, key, raw)
+                return
+            except Exception as e:
+                LOG.warning("Redis cache write failed, using disk: %s", e)
+        self._disk_set(key, raw)
+
+    def set_many(self, mapping):
+        """Store every key -> value of `mapping`, pipelined into one round trip on Redis."""
+        raws = {key: codec.dumps_str(value) for key, value in mapping.items()}
+        if not raws:
+            return
+        r = get_redis(self._redis_url)
+        if r is not None:
+            try:
+                pipe = r.pipeline(transaction=False)
+                for key, raw in raws.items():
+                    self._redis_set(pipe, key, raw)
+                pipe.execute()
+                return
+            except Exception as e:
+                LOG.warning("Redis cache write failed, using disk: %s", e)
+        for key, raw in raws.items():
+            self._disk_set(key, raw)
+
+    # --- Redis backend: a sorted set of keys by write time, their sizes and a running total,
+    # updated and evicted atomically by one script per write
+
+    def _redis_set(self, r, key, raw):
+        ns = self.namespace
+        keys = [f"{ns}:{self._digest(key)}", f"{ns}:__index", f"{ns}:__sizes", f"{ns}:__bytes"]
+        _set_script(r)(keys=keys, args=[raw, self.ttl, time.time(), self.max_bytes], client=r)
+
+    # --- Disk backend: one JSON file per key, expiry stored inline
+
+    def _path(self, key):
+        return self._dir / f"{self._digest(key)}.json"
+
+    def _disk_get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fh:
+                entry = codec.loads(fh.read())
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires", 0) < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("value")
+
+    def _disk_set(self, key, raw):
+        self._dir.mkdir(parents=True, exist_ok=True)
+        body = f'{{"expires":{time.time() + self.ttl},"value":{raw}}}'
+        atomic_write(self._path(key), body.encode())
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(p.stat().st_size for p in self._dir.glob("*.json"))
+            else:
+                self._disk_bytes += len(body)
+            over = self._disk_bytes > self.max_bytes
+        if over:
+            self._disk_evict()
+
+    def _disk_evict(self):
+        files = []
+        for p in self._dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9  # leave headroom so we don't evict on every write
+        now = time.time()
+        for mtime, size, p in files:
+            if total <= target and mtime > now - self.ttl:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+
+_scrape_cache = None
+
+def get_scrape_cache():
+    global _scrape_cache
+    if _scrape_cache is None:
+        _scrape_cache = TTLCache(
+            "scrape",
+            ttl=cache_setting('SCRAPE_CACHE_TTL', 3600),
+            max_bytes=cache_setting('SCRAPE_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+        )
+    return _scrape_cache
+
+def scrape_cache_key(source, query, location, page):
+    return "|".join([source, normalize_text(query), normalize_text(location), str(page)])
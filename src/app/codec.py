@@ -0,0 +1,73 @@
+"""
+JSON encoding for the hot paths: API bodies, results files, caches, events
+and Celery task messages.
+
+Uses orjson when it is installed and the stdlib json module otherwise.
+Both produce the same compact UTF-8 output, so callers don't care which
+one is active (BACKEND says which). scripts/bench_json.py compares them.
+"""
+import json
+import uuid
+import decimal
+import datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+CELERY_SERIALIZER = "fastjson"
+CELERY_CONTENT_TYPE = "application/x-fastjson"
+
+
+def _default(obj):
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+if orjson is not None:
+    def dumps(obj, default=None):
+        """Compact UTF-8 JSON bytes. A custom `default` also receives datetimes."""
+        option = orjson.OPT_NON_STR_KEYS
+        if default is not None:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        return orjson.dumps(obj, default=default or _default, option=option)
+
+    loads = orjson.loads
+else:
+    def dumps(obj, default=None):
+        """Compact UTF-8 JSON bytes. A custom `default` also receives datetimes."""
+        return json.dumps(obj, default=default or _default, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def loads(data):
+        return json.loads(data)
+
+def dumps_str(obj, default=None):
+    return dumps(obj, default).decode()
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by the codec; pretty-printing and sorted keys still use the stdlib."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get("indent") or kwargs.get("sort_keys"):
+            return super().dumps(obj, **kwargs)
+        return dumps_str(obj, default=self.default)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+
+def register_celery_serializer():
+    """Make the codec available to Celery as the `fastjson` serializer."""
+    from kombu.serialization import register
+    register(CELERY_SERIALIZER, dumps_str, loads, content_type=CELERY_CONTENT_TYPE, content_encoding="utf-8")
@@ -6,6 +6,16 @@ class BaseConfig:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///ai_job_scraper.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Database engine (see engine_options). SQLite: web and workers share one file, so use WAL
+    # and wait for locks instead of failing; server databases: pooled, pre-pinged connections
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '15000'))
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     OUTPUT_FOLDER = os.getenv('OUTPUT_FOLDER', 'outputs')
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB upload limit
@@ -17,6 +27,17 @@ class BaseConfig:
     _backend = os.getenv('CELERY_RESULT_BACKEND')
     CELERY_RESULT_BACKEND = _backend if _backend else 'cache+memory://'
     
+    # Shared cache / hot state. Unset means caches fall back to CACHE_FOLDER on local disk
+    REDIS_URL = os.getenv('REDIS_URL')
+    CACHE_FOLDER = os.getenv('CACHE_FOLDER', 'cache')
+    SCRAPE_CACHE_TTL = int(os.getenv('SCRAPE_CACHE_TTL', '3600'))
+    SCRAPE_CACHE_MAX_BYTES = int(os.getenv('SCRAPE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    MATCH_CACHE_TTL = int(os.getenv('MATCH_CACHE_TTL', str(7 * 24 * 3600)))
+    MATCH_CACHE_MAX_BYTES = int(os.getenv('MATCH_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+    # Default prefetch; worker profiles override it with --prefetch-multiplier
+    CELERY_PREFETCH_MULTIPLIER = int(os.getenv('CELERY_PREFETCH_MULTIPLIER', '1'))
+
     # For testing without a worker, set to True to run tasks synchronously
     CELERY_ALWAYS_EAGER = os.getenv('CELERY_ALWAYS_EAGER', 'true').lower() in ('true', '1')
 
@@ -40,12 +61,53 @@ class BaseConfig:
 
     # OpenAI
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # any OpenAI-compatible endpoint
+    OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
+    OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+    MATCH_BATCH_TOKENS = int(os.getenv('MATCH_BATCH_TOKENS', '6000'))
+    MATCH_MAX_IN_FLIGHT = int(os.getenv('MATCH_MAX_IN_FLIGHT', '4'))
+    MATCH_TOP_K = int(os.getenv('MATCH_TOP_K', '20'))  # postings forwarded to the LLM after local ranking
 
     # Stripe
     STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
 
     # App limits
+    # Identical resume + query submissions within this window attach to the existing job
+    DEDUP_WINDOW_SECONDS = int(os.getenv('DEDUP_WINDOW_SECONDS', '3600'))
     FREE_JOB_MONTHLY = int(os.getenv('FREE_JOB_MONTHLY', '100'))
+    PRO_JOB_MONTHLY = int(os.getenv('PRO_JOB_MONTHLY', '1000'))  # admins are unlimited
+    # Guest users (and their jobs) are purged once they have had no new job for this long
+    GUEST_TTL_SECONDS = int(os.getenv('GUEST_TTL_SECONDS', str(7 * 24 * 3600)))
+    GUEST_PURGE_INTERVAL_SECONDS = int(os.getenv('GUEST_PURGE_INTERVAL_SECONDS', '3600'))
+    # Stored resumes / result files are swept this long after their last write (see retention.py)
+    RESUME_RETENTION_SECONDS = int(os.getenv('RESUME_RETENTION_SECONDS', str(7 * 24 * 3600)))
+    RESULT_RETENTION_SECONDS = int(os.getenv('RESULT_RETENTION_SECONDS', str(30 * 24 * 3600)))
+    RETENTION_SWEEP_INTERVAL_SECONDS = int(os.getenv('RETENTION_SWEEP_INTERVAL_SECONDS', '3600'))
     CELERY_RESULT_EXPIRES = int(os.getenv('CELERY_RESULT_EXPIRES', 3600))
 
     JSON_SORT_KEYS = False
+
+
+
+def _setting(config, key):
+    return config.get(key, getattr(BaseConfig, key))
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database URI."""
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        # sqlite3's own lock wait; busy_timeout is also set per connection (sqlite_pragmas)
+        return {'connect_args': {'timeout': _setting(config, 'SQLITE_BUSY_TIMEOUT_MS') / 1000}}
+    return {
+        'pool_size': _setting(config, 'DB_POOL_SIZE'),
+        'max_overflow': _setting(config, 'DB_MAX_OVERFLOW'),
+        'pool_timeout': _setting(config, 'DB_POOL_TIMEOUT'),
+        'pool_recycle': _setting(config, 'DB_POOL_RECYCLE'),
+        'pool_pre_ping': True,
+    }
+
+def sqlite_pragmas(config):
+    return (
+        f"PRAGMA journal_mode={_setting(config, 'SQLITE_JOURNAL_MODE')}",
+        f"PRAGMA synchronous={_setting(config, 'SQLITE_SYNCHRONOUS')}",
+        f"PRAGMA busy_timeout={int(_setting(config, 'SQLITE_BUSY_TIMEOUT_MS'))}",
+    )
@@ -0,0 +1,50 @@
+"""
+Job progress events over Redis pub/sub.
+
+Celery tasks publish a small JSON message whenever a job's status,
+progress or results change; the /task/<id>/events SSE endpoint relays them
+to the browser. Without Redis, publishing is a no-op and clients poll.
+"""
+import logging
+
+from . import codec
+from .utils import get_redis
+
+LOG = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('completed', 'failed')
+# The only job fields that ever reach a browser; results paths and resume skills stay server-side
+PUBLIC_FIELDS = ('status', 'progress', 'message', 'has_results')
+
+
+def public(payload):
+    return {k: payload[k] for k in PUBLIC_FIELDS if k in payload}
+
+def channel(job_id):
+    return f"job:{job_id}:events"
+
+def publish(job_id, **payload):
+    payload = public(payload)
+    r = get_redis()
+    if r is None or not payload:
+        return
+    try:
+        r.publish(channel(job_id), codec.dumps(payload))
+    except Exception as e:
+        LOG.warning("Failed to publish event for job %s: %s", job_id, e)
+
+def subscribe(job_id):
+    """Return a pubsub subscribed to the job's channel, or None when Redis is unavailable."""
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        pubsub = r.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(channel(job_id))
+        return pubsub
+    except Exception as e:
+        LOG.warning("Failed to subscribe to events for job %s: %s", job_id, e)
+        return None
+
+def sse(payload):
+    return f"data: {codec.dumps_str(public(payload))}\n\n"
@@ -0,0 +1,132 @@
+"""
+HTTP fetch engine for scrapers.
+
+Listing pages are fetched through one shared, connection-pooled
+requests.Session per process (keep-alive + gzip). Responses carrying an
+ETag or Last-Modified header are remembered so repeat fetches of the same
+URL go out as conditional requests and a 304 reuses the cached body.
+"""
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+LOG = logging.getLogger(__name__)
+
+HTTP_POOL_SIZE = int(os.getenv('SCRAPER_HTTP_POOL_SIZE', '10'))
+HTTP_TIMEOUT = float(os.getenv('SCRAPER_HTTP_TIMEOUT', '15'))
+VALIDATOR_CACHE_SIZE = int(os.getenv('SCRAPER_VALIDATOR_CACHE_SIZE', '512'))
+# Bodies are kept in memory in every worker process, so the cache is capped by size too
+VALIDATOR_CACHE_MAX_BYTES = int(os.getenv('SCRAPER_VALIDATOR_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/120.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+
+class FetchError(Exception):
+    def __init__(self, url, status, retry_after=None):
+        super().__init__(f"GET {url} returned {status}")
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class _ValidatorCache:
+    """Small LRU of url -> (etag, last_modified, body) for conditional GETs, bounded by entries and bytes."""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            entry = self._data.get(url)
+            if entry is not None:
+                self._data.move_to_end(url)
+            return entry
+
+    def put(self, url, etag, last_modified, body):
+        size = len(body)
+        with self._lock:
+            old = self._data.pop(url, None)
+            if old is not None:
+                self.bytes -= len(old[2])
+            if size > self.max_bytes:
+                return  # never revalidated: it would evict everything else
+            self._data[url] = (etag, last_modified, body)
+            self.bytes += size
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= len(evicted[2])
+
+
+_session = None
+_session_lock = threading.Lock()
+_validators = _ValidatorCache(VALIDATOR_CACHE_SIZE, VALIDATOR_CACHE_MAX_BYTES)
+
+def get_http_session():
+    """Return this process's shared pooled session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+        return _session
+
+def fetch(url, timeout=None, session=None):
+    """GET `url` and return the decoded body, using a conditional request when possible."""
+    session = session or get_http_session()
+    headers = {}
+    cached = _validators.get(url)
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    resp = session.get(url, headers=headers, timeout=timeout or HTTP_TIMEOUT)
+    if resp.status_code == 304 and cached:
+        LOG.debug("Not modified: %s", url)
+        return cached[2]
+    if resp.status_code >= 400:
+        raise FetchError(url, resp.status_code, _retry_after(resp.headers.get("Retry-After")))
+
+    body = resp.text
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if etag or last_modified:
+        _validators.put(url, etag, last_modified, body)
+    return body
@@ -0,0 +1,76 @@
+"""
+Guest identities for anonymous uploads.
+
+A guest's User row is created on their first upload and its id is kept,
+with the time of its last job, in the signed session cookie; later
+uploads from the same browser session reuse it without a query. Guests
+with no new job for GUEST_TTL_SECONDS are purged, together with their
+jobs and their jobs' hot state, in batches by a periodic task.
+"""
+import time
+import uuid
+import logging
+from datetime import datetime, timedelta
+
+from flask import current_app, session
+from sqlalchemy import delete, exists, select
+
+from . import db
+from .models import User, ScrapeJob, scrape_job_posting
+from .progress import delete_state
+from .results import delete_job_files
+
+LOG = logging.getLogger(__name__)
+
+SESSION_KEY = 'guest'
+GUEST_EMAIL_DOMAIN = 'guest.local'
+# the cookie is trusted for this share of the TTL, so a purge can't race a reused id
+COOKIE_TRUST_FRACTION = 0.9
+
+
+def guest_ttl():
+    return current_app.config.get('GUEST_TTL_SECONDS', 7 * 24 * 3600)
+
+def guest_user_id():
+    """The current browser session's guest user id, creating the guest on first use."""
+    ttl = guest_ttl()
+    cached = session.get(SESSION_KEY)
+    # trust the cookie while the guest's last activity is well inside the purge cutoff
+    if cached and time.time() - cached[1] < ttl * COOKIE_TRUST_FRACTION:
+        return cached[0]
+    user = User(email=f"{uuid.uuid4().hex}@{GUEST_EMAIL_DOMAIN}", is_guest=True)
+    db.session.add(user)
+    db.session.commit()
+    session[SESSION_KEY] = [user.id, int(time.time())]
+    return user.id
+
+def touch_guest(user_id):
+    """Record a new job for the session's guest so the cookie stays trusted as long as the guest row lives."""
+    session[SESSION_KEY] = [user_id, int(time.time())]
+
+def purge_expired_guests(batch_size=500, ttl=None):
+    """
+    Delete guests with no job newer than their TTL, with their jobs, `batch_size` guests
+    per transaction. Returns the count.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=guest_ttl() if ttl is None else ttl)
+    recent_job = exists().where(ScrapeJob.user_id == User.id, ScrapeJob.created_at >= cutoff)
+    purged = 0
+    while True:
+        ids = db.session.scalars(
+            select(User.id).where(User.is_guest.is_(True), User.created_at < cutoff, ~recent_job)
+            .limit(batch_size)).all()
+        if not ids:
+            break
+        job_ids = db.session.scalars(select(ScrapeJob.id).where(ScrapeJob.user_id.in_(ids))).all()
+        if job_ids:
+            db.session.execute(delete(scrape_job_posting).where(scrape_job_posting.c.scrape_job_id.in_(job_ids)))
+            db.session.execute(delete(ScrapeJob).where(ScrapeJob.id.in_(job_ids)))
+        db.session.execute(delete(User).where(User.id.in_(ids)))
+        db.session.commit()
+        delete_state(job_ids)
+        for job_id in job_ids:
+            delete_job_files(job_id)
+        purged += len(ids)
+        LOG.info("Purged %d expired guests and %d jobs", len(ids), len(job_ids))
+    return purged
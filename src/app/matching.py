@@ -0,0 +1,197 @@
+"""
+Batched resume-to-job matching against an OpenAI-compatible chat API.
+
+Jobs are trimmed to the fields the model needs, packed into batches that
+fit a token budget, and sent with a bounded number of requests in flight.
+Each batch returns its own JSON; the batches are merged into one list
+ranked by score. A failed batch is logged and skipped so the others still
+produce results.
+
+Answers are cached per (profile hash, job content hash, model, prompt
+version), so repeat and overlapping searches only send unseen postings to
+the model. `rank_and_match` puts a local pre-ranking (see ranking) in
+front of it so only the top K postings are sent at all.
+"""
+import re
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import codec
+from .cache import TTLCache, cache_setting, normalize_text
+from .ranking import local_scores
+
+LOG = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are a job matching assistant. Analyze the provided resume against job postings. "
+    "For each job, provide a match score (0-100), top 3 matching skills, and top 3 skill gaps. "
+    "Return valid JSON: {\"matches\": [{ref, title, score, matching_skills, skill_gaps}]}, "
+    "echoing each job's ref."
+)
+DESCRIPTION_CHARS = 600
+# Bump when SYSTEM_PROMPT or compact_job change so cached answers are not reused
+PROMPT_VERSION = 1
+CACHED_FIELDS = ("title", "score", "matching_skills", "skill_gaps")
+
+
+def compact_job(ref, job):
+    """The subset of a posting the model needs, with a `ref` to map the answer back."""
+    item = {"ref": ref}
+    for field in ("title", "company", "location", "experience", "salary"):
+        if job.get(field):
+            item[field] = job[field]
+    if job.get("description"):
+        item["description"] = " ".join(job["description"].split())[:DESCRIPTION_CHARS]
+    return item
+
+def dumps(value):
+    return codec.dumps_str(value)
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text; close enough for budgeting
+    return len(text) // 4 + 1
+
+def make_batches(items, budget_tokens, overhead_tokens=0):
+    """Greedily pack items into batches whose serialized size stays within the budget."""
+    batches, current, used = [], [], overhead_tokens
+    for item in items:
+        cost = estimate_tokens(dumps(item))
+        if current and used + cost > budget_tokens:
+            batches.append(current)
+            current, used = [], overhead_tokens
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def parse_matches(text):
+    """Pull the list of match dicts out of a model answer (object, bare list or fenced JSON)."""
+    match = re.search(r"[\[{].*[\]}]", text or "", re.S)
+    if not match:
+        raise ValueError("no JSON in model response")
+    data = codec.loads(match.group(0))
+    if isinstance(data, dict):
+        data = data.get("matches") or data.get("results") or next(
+            (v for v in data.values() if isinstance(v, list)), [])
+    return [m for m in data if isinstance(m, dict)]
+
+def match_batch(client, model, resume, batch):
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Candidate resume:\n{dumps(resume or {})}\n\n"
+                                        f"Please analyze these job postings:\n{dumps(batch)}"},
+        ],
+        temperature=0.3,
+    )
+    return parse_matches(response.choices[0].message.content)
+
+_match_cache = None
+
+def get_match_cache():
+    global _match_cache
+    if _match_cache is None:
+        _match_cache = TTLCache(
+            "match",
+            ttl=cache_setting('MATCH_CACHE_TTL', 7 * 24 * 3600),
+            max_bytes=cache_setting('MATCH_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+        )
+    return _match_cache
+
+def job_content_hash(job):
+    """Hash of the normalized posting fields the model sees, independent of url or scrape time."""
+    item = compact_job(0, job)
+    del item["ref"]
+    return hashlib.sha256(dumps({k: normalize_text(v) for k, v in item.items()}).encode()).hexdigest()
+
+def profile_hash(resume):
+    """Hash of the profile exactly as sent to the model, form overlays included (not just the file's hash)."""
+    return hashlib.sha256(dumps(resume or {}).encode()).hexdigest()
+
+def match_cache_key(profile, job, model):
+    return f"{profile}:{job_content_hash(job)}:{model}:v{PROMPT_VERSION}"
+
+def match_jobs(client, model, resume, jobs, budget_tokens=6000, max_in_flight=4, cache=None):
+    """
+    Score `jobs` against `resume`. Returns {"results", "batches", "failed_batches", "cached"};
+    each result carries the posting's `ref` (its index in `jobs`), url and score.
+    Postings with a cached answer in `cache` are not sent to the model.
+    """
+    profile = profile_hash(resume) if cache is not None else None
+    keys = [match_cache_key(profile, job, model) for job in jobs] if cache is not None else []
+    cached = cache.get_many(keys) if cache is not None else [None] * len(jobs)
+
+    results, failed, seen = [], 0, set()
+    for ref, hit in enumerate(cached):
+        if hit is not None:
+            results.append(dict(hit, ref=ref, url=jobs[ref].get("url")))
+            seen.add(ref)
+
+    items = [compact_job(i, job) for i, job in enumerate(jobs) if i not in seen]
+    overhead = estimate_tokens(SYSTEM_PROMPT + dumps(resume or {}))
+    batches = make_batches(items, budget_tokens, overhead)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as pool:
+        futures = {pool.submit(match_batch, client, model, resume, batch): n for n, batch in enumerate(batches)}
+        for future in as_completed(futures):
+            try:
+                matches = future.result()
+            except Exception as e:
+                failed += 1
+                LOG.warning("Match batch %d/%d failed: %s", futures[future] + 1, len(batches), e)
+                continue
+            fresh = {}
+            for m in matches:
+                ref = m.get("ref")
+                if not isinstance(ref, int) or not 0 <= ref < len(jobs) or ref in seen:
+                    continue
+                seen.add(ref)
+                m["url"] = jobs[ref].get("url")
+                m.setdefault("title", jobs[ref].get("title"))
+                try:
+                    m["score"] = int(m.get("score") or 0)
+                except (TypeError, ValueError):
+                    m["score"] = 0
+                results.append(m)
+                if cache is not None:
+                    fresh[keys[ref]] = {k: m[k] for k in CACHED_FIELDS if k in m}
+            if fresh:
+                cache.set_many(fresh)  # one round trip per batch
+
+    results.sort(key=lambda m: m["score"], reverse=True)
+    hits = len(jobs) - len(items)
+    LOG.info("Matched %d jobs (%d cached) in %d batches (%d failed)", len(results), hits, len(batches), failed)
+    if cache is not None:
+        LOG.info("Match cache stats: %s", cache.stats())
+    return {"results": results, "batches": len(batches), "failed_batches": failed, "cached": hits}
+
+def rank_and_match(client, model, resume, jobs, top_k=20, **kwargs):
+    """
+    Rank every posting locally, then have the model score the best `top_k`.
+    Postings the model did not score only carry `local_score` (a cosine
+    similarity, not a match percentage), so `score` stays unset for them.
+    With no `client` the result is the local ranking alone. Model-scored
+    postings come first.
+    """
+    scores = local_scores(resume, jobs)
+    order = sorted(range(len(jobs)), key=lambda i: -scores[i])
+    head = order[:top_k] if client is not None else []
+
+    outcome = {"results": [], "batches": 0, "failed_batches": 0, "cached": 0}
+    if head:
+        outcome = match_jobs(client, model, resume, [jobs[i] for i in head], **kwargs)
+        for m in outcome["results"]:
+            m["ref"] = head[m["ref"]]
+            m["local_score"] = float(scores[m["ref"]])
+            m["scored_by"] = "llm"
+
+    scored = {m["ref"] for m in outcome["results"]}
+    for i in order:
+        if i not in scored:
+            outcome["results"].append({"ref": i, "url": jobs[i].get("url"), "title": jobs[i].get("title"),
+                                       "local_score": float(scores[i]), "scored_by": "local"})
+    outcome["forwarded"] = len(head)
+    return outcome
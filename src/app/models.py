@@ -1,6 +1,7 @@
 from . import db
 from datetime import datetime
 from sqlalchemy.ext.hybrid import hybrid_property
+from flask_login import UserMixin
 import enum
 
 class RoleEnum(enum.Enum):
@@ -8,7 +9,11 @@ class RoleEnum(enum.Enum):
     PRO = 'pro'
     ADMIN = 'admin'
 
-class User(db.Model):
+class User(UserMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_user_is_guest_created_at', 'is_guest', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(256), unique=True, nullable=False)
     google_id = db.Column(db.String(256), unique=True, nullable=True)
@@ -18,6 +23,7 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     years_of_experience = db.Column(db.Integer, nullable=True)
     preferred_skills = db.Column(db.String(512), nullable=True)  # CSV list
+    is_guest = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
 class SavedSearch(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -27,6 +33,11 @@ class SavedSearch(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class ScrapeJob(db.Model):
+    __table_args__ = (
+        db.Index('ix_scrape_job_dedup_hash_created_at', 'dedup_hash', 'created_at'),
+        db.Index('ix_scrape_job_user_id_created_at', 'user_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     job_titles = db.Column(db.String(256), nullable=True)
@@ -39,3 +50,29 @@ class ScrapeJob(db.Model):
     results_path = db.Column(db.String(512), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     dedup_hash = db.Column(db.String(128), nullable=True)
+
+scrape_job_posting = db.Table(
+    'scrape_job_posting',
+    db.Column('scrape_job_id', db.Integer, db.ForeignKey('scrape_job.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('job_posting_id', db.Integer, db.ForeignKey('job_posting.id', ondelete='CASCADE'), primary_key=True,
+              index=True),
+)
+
+class JobPosting(db.Model):
+    """One row per distinct posting (by canonical URL), shared by every scrape that found it."""
+    id = db.Column(db.Integer, primary_key=True)
+    url_hash = db.Column(db.String(64), unique=True, nullable=False)  # sha256 of the canonical URL
+    url = db.Column(db.String(1024), nullable=True)
+    source = db.Column(db.String(64), nullable=True)
+    title = db.Column(db.String(256), nullable=True)
+    company = db.Column(db.String(256), nullable=True)
+    location = db.Column(db.String(256), nullable=True)
+    salary = db.Column(db.String(128), nullable=True)
+    experience = db.Column(db.String(128), nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    skills = db.Column(db.String(512), nullable=True)  # CSV list
+    first_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    scrape_jobs = db.relationship('ScrapeJob', secondary=scrape_job_posting, lazy='dynamic',
+                                  backref=db.backref('postings', lazy='dynamic'))
@@ -0,0 +1,129 @@
+"""
+Normalized storage for scraped postings.
+
+Each distinct posting is one JobPosting row, identified by the hash of its
+canonical URL, and linked to every ScrapeJob that found it. Writes are
+bulk upserts: one INSERT .. ON CONFLICT statement per batch of postings
+and one for the links, instead of a query per row. MySQL has no
+RETURNING, so there the upsert is ON DUPLICATE KEY UPDATE followed by one
+SELECT of the batch's ids.
+"""
+import hashlib
+import logging
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy import func, select
+
+from . import db
+from .cache import normalize_text
+from .models import JobPosting, scrape_job_posting
+
+LOG = logging.getLogger(__name__)
+
+UPSERT_BATCH_SIZE = 500
+TRACKING_PARAMS = ("utm_", "src", "ref", "referrer", "fbclid", "gclid", "trk", "tracking")
+UPDATED_FIELDS = ("url", "source", "title", "company", "location", "salary", "experience", "description",
+                  "skills", "last_seen_at")
+
+
+def canonical_url(url):
+    """Lower-case scheme and host, drop fragment, tracking params and trailing slash; sort the query."""
+    parts = urlsplit(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith(TRACKING_PARAMS))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+def posting_hash(job):
+    """sha256 of the canonical URL; postings without one are keyed by title, company and location."""
+    if job.get("url"):
+        key = canonical_url(job["url"])
+    else:
+        key = "|".join(normalize_text(job.get(f)) for f in ("title", "company", "location"))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def _row(job, now):
+    def text(field, length):
+        value = job.get(field)
+        return str(value)[:length] if value not in (None, "") else None
+
+    return {
+        "url_hash": posting_hash(job),
+        "url": text("url", 1024),
+        "source": text("source", 64),
+        "title": text("title", 256),
+        "company": text("company", 256),
+        "location": text("location", 256),
+        "salary": text("salary", 128),
+        "experience": text("experience", 128),
+        "description": job.get("description") or None,
+        "skills": ",".join(job.get("skills") or [])[:512] or None,
+        "first_seen_at": now,
+        "last_seen_at": now,
+    }
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+def _insert(table):
+    dialect = _dialect()
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+    else:
+        raise NotImplementedError(f"bulk upsert is not supported on {dialect}")
+    return insert(table)
+
+def _upsert_batch(batch):
+    """Upsert one batch of posting rows; returns {url_hash: id}."""
+    table = JobPosting.__table__
+    stmt = _insert(table).values(batch)
+    if _dialect() in ("mysql", "mariadb"):
+        # no RETURNING on MySQL: upsert, then read the ids back by url_hash
+        stmt = stmt.on_duplicate_key_update(
+            {f: func.coalesce(stmt.inserted[f], table.c[f]) for f in UPDATED_FIELDS})
+        db.session.execute(stmt)
+        hashes = [r["url_hash"] for r in batch]
+        rows = db.session.execute(select(table.c.id, table.c.url_hash).where(table.c.url_hash.in_(hashes)))
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["url_hash"],
+            # a re-scrape missing a field keeps the stored value
+            set_={f: func.coalesce(stmt.excluded[f], table.c[f]) for f in UPDATED_FIELDS},
+        ).returning(table.c.id, table.c.url_hash)
+        rows = db.session.execute(stmt)
+    return {h: i for i, h in rows}
+
+def _link_batch(links):
+    stmt = _insert(scrape_job_posting).values(links)
+    if _dialect() in ("mysql", "mariadb"):
+        stmt = stmt.prefix_with("IGNORE")
+    else:
+        stmt = stmt.on_conflict_do_nothing()
+    db.session.execute(stmt)
+
+def upsert_postings(scrape_job_id, jobs, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Insert or refresh `jobs` as JobPosting rows and link them to the scrape job.
+    Returns the posting ids in `jobs` order (duplicates share an id). The caller commits.
+    """
+    now = datetime.utcnow()
+    rows, hashes = {}, []
+    for job in jobs:
+        row = _row(job, now)
+        rows.setdefault(row["url_hash"], row)
+        hashes.append(row["url_hash"])
+    rows = list(rows.values())
+
+    ids = {}
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        ids.update(_upsert_batch(batch))
+        _link_batch([{"scrape_job_id": scrape_job_id, "job_posting_id": ids[r["url_hash"]]} for r in batch])
+
+    LOG.info("Upserted %d distinct postings for scrape job %s", len(rows), scrape_job_id)
+    return [ids[h] for h in hashes]
@@ -0,0 +1,70 @@
+"""
+Hot job state (status, progress, results pointer) in a Redis hash.
+
+Tasks write every progress step here and web requests read it back, so
+the ScrapeJob row is only written for terminal states. Each write is also
+published on the job's event channel for SSE listeners, limited to the
+fields clients may see (events.PUBLIC_FIELDS). All helpers
+return None/False when Redis is unavailable and callers fall back to the
+database.
+"""
+import os
+import logging
+
+from . import codec
+from .events import channel, public
+from .utils import get_redis
+
+LOG = logging.getLogger(__name__)
+
+STATE_TTL = int(os.getenv('PROGRESS_STATE_TTL', str(24 * 3600)))
+
+
+def state_key(job_id):
+    return f"job:{job_id}:state"
+
+def set_state(job_id, **fields):
+    """Merge `fields` into the job's hot state and publish them. Returns False without Redis."""
+    r = get_redis()
+    if r is None:
+        return False
+    values = {k: int(v) if isinstance(v, bool) else v for k, v in fields.items() if v is not None}
+    event = public(fields)
+    try:
+        pipe = r.pipeline()
+        pipe.hset(state_key(job_id), mapping=values)
+        pipe.expire(state_key(job_id), STATE_TTL)
+        if event:
+            pipe.publish(channel(job_id), codec.dumps(event))
+        pipe.execute()
+        return True
+    except Exception as e:
+        LOG.warning("Failed to write hot state for job %s: %s", job_id, e)
+        return False
+
+def get_state(job_id):
+    """Return the job's hot state as a dict, or None if missing or Redis is unavailable."""
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        raw = r.hgetall(state_key(job_id))
+    except Exception as e:
+        LOG.warning("Failed to read hot state for job %s: %s", job_id, e)
+        return None
+    if not raw:
+        return None
+    state = {k.decode(): v.decode() for k, v in raw.items()}
+    state['progress'] = int(state.get('progress', 0))
+    state['has_results'] = state.get('has_results') == '1'
+    return state
+
+def delete_state(job_ids):
+    """Drop the hot state of deleted jobs so readers fall back to the (missing) row."""
+    r = get_redis()
+    if r is None or not job_ids:
+        return
+    try:
+        r.delete(*(state_key(job_id) for job_id in job_ids))
+    except Exception as e:
+        LOG.warning("Failed to delete hot state for %d jobs: %s", len(job_ids), e)
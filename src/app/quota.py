@@ -0,0 +1,132 @@
+"""
+Per-user monthly job quotas.
+
+Usage is an atomic Redis counter per user and calendar month (UTC) that
+expires when the month ends, so a check is one round trip (INCR +
+EXPIREAT in a pipeline) and never scans ScrapeJob. An upload reserves a
+slot before doing any file I/O or DB writes and releases it if no job
+ends up being created. A fresh counter is reconciled with the database in
+the background (e.g. after a Redis restart). Without Redis the count
+falls back to an indexed (user_id, created_at) range query.
+"""
+import calendar
+import logging
+from datetime import datetime
+
+from flask import current_app
+
+from .models import RoleEnum, ScrapeJob
+from .utils import get_redis
+
+LOG = logging.getLogger(__name__)
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, limit, resets_at):
+        super().__init__(f"monthly quota of {limit} jobs exceeded")
+        self.limit = limit
+        self.resets_at = resets_at
+
+
+def month_bounds(now=None):
+    """(start, end) of the UTC calendar month containing `now`."""
+    now = now or datetime.utcnow()
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+def _timestamp(dt):
+    return calendar.timegm(dt.timetuple())  # month bounds are naive UTC
+
+def quota_key(user_id, now=None):
+    return f"quota:{user_id}:{month_bounds(now)[0]:%Y%m}"
+
+def monthly_limit(role):
+    """Jobs per month for a role; None means unlimited."""
+    role = role or RoleEnum.FREE
+    if role == RoleEnum.ADMIN:
+        return None
+    if role == RoleEnum.PRO:
+        return current_app.config.get('PRO_JOB_MONTHLY', 1000)
+    return current_app.config.get('FREE_JOB_MONTHLY', 100)
+
+def used_in_db(user_id, now=None):
+    start, end = month_bounds(now)
+    return ScrapeJob.query.filter(ScrapeJob.user_id == user_id,
+                                  ScrapeJob.created_at >= start, ScrapeJob.created_at < end).count()
+
+def reserve(user_id, role=None):
+    """
+    Count one job against the user's (or guest's) quota, raising QuotaExceeded if it is used up.
+    Returns True when the slot was taken in Redis (and must be released if the upload is abandoned).
+    """
+    limit = monthly_limit(role)
+    if limit is None:
+        return False
+    _, end = month_bounds()
+    r = get_redis()
+    if r is not None:
+        key = quota_key(user_id)
+        try:
+            pipe = r.pipeline()
+            pipe.incr(key)
+            pipe.expireat(key, _timestamp(end))
+            used, _ = pipe.execute()
+        except Exception as e:
+            LOG.warning("Quota counter unavailable, checking the database: %s", e)
+        else:
+            if used == 1:
+                _schedule_reconcile(user_id)
+            if used > limit:
+                release(user_id)
+                raise QuotaExceeded(limit, end)
+            return True
+    if used_in_db(user_id) >= limit:
+        raise QuotaExceeded(limit, end)
+    return False
+
+def release(user_id):
+    """Give back a slot taken by reserve() for an upload that didn't create a job."""
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        r.decr(quota_key(user_id))
+    except Exception as e:
+        LOG.warning("Failed to release quota slot for user %s: %s", user_id, e)
+
+# Raise the counter to ARGV[1] (expiring at ARGV[2]) unless it is already higher; returns {before, after}
+RECONCILE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or 0)
+local used = tonumber(ARGV[1])
+if used <= current then
+  return {current, current}
+end
+redis.call('SET', KEYS[1], used)
+redis.call('EXPIREAT', KEYS[1], ARGV[2])
+return {current, used}
+"""
+
+def reconcile(user_id):
+    """Raise the user's counter to the database count if Redis lost track (never lowers it)."""
+    r = get_redis()
+    if r is None:
+        return None
+    used = used_in_db(user_id)
+    # compare-and-set in one script so a concurrent reserve() can't be overwritten
+    current, result = r.register_script(RECONCILE_SCRIPT)(
+        keys=[quota_key(user_id)], args=[used, _timestamp(month_bounds()[1])])
+    if result != current:
+        LOG.info("Reconciled quota for user %s: %s -> %s", user_id, current, result)
+    return result
+
+def _schedule_reconcile(user_id):
+    try:
+        from .tasks import celery, reconcile_quota
+        if celery.conf.task_always_eager:
+            # an eager task ignores the countdown and would count before this upload's job row exists
+            return
+        # delayed so the upload that created the counter has written its ScrapeJob
+        reconcile_quota.apply_async(args=[user_id], countdown=60)
+    except Exception as e:
+        LOG.warning("Failed to queue quota reconcile for user %s: %s", user_id, e)
@@ -0,0 +1,58 @@
+"""
+Local pre-ranking of postings against a resume profile.
+
+Texts are tokenized into word unigrams and bigrams, hashed into a fixed
+number of buckets and weighted by TF-IDF; every posting is then scored
+against the resume with a single matrix-vector product. This is cheap
+enough to run on every scrape, so only the best postings need to go to
+the LLM, and it still yields a ranked list when no API key is configured.
+"""
+import re
+import zlib
+import logging
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+N_FEATURES = 2 ** 13
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:[./][a-z0-9+#]+)*")
+
+
+def resume_text(resume):
+    resume = resume or {}
+    parts = list(resume.get("skills") or []) + list(resume.get("titles") or [])
+    parts.append(resume.get("summary") or "")
+    return " ".join(parts)
+
+def job_text(job):
+    return " ".join(str(job.get(f) or "") for f in ("title", "experience", "description"))
+
+def _features(text, n_features):
+    tokens = _TOKEN_RE.findall(text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    # crc32 rather than hash() so buckets are stable across processes
+    return [zlib.crc32(g.encode()) % n_features for g in grams]
+
+def vectorize(texts, n_features=N_FEATURES):
+    """Hashed n-gram term counts, one row per text."""
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        buckets = _features(text, n_features)
+        rows.extend([i] * len(buckets))
+        cols.extend(buckets)
+    counts = np.zeros((len(texts), n_features), dtype=np.float32)
+    np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+    return counts
+
+def local_scores(resume, jobs, n_features=N_FEATURES):
+    """Cosine similarity (0-100) of each posting to the resume, in `jobs` order."""
+    if not jobs:
+        return np.zeros(0, dtype=np.float32)
+    counts = vectorize([resume_text(resume)] + [job_text(j) for j in jobs], n_features)
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(counts)) / (1 + df)) + 1
+    tfidf = np.log1p(counts) * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    tfidf /= np.where(norms == 0, 1, norms)
+    return np.round(tfidf[1:] @ tfidf[0] * 100, 1)
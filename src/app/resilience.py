@@ -0,0 +1,148 @@
+"""
+Failure handling for scrapers: per-host rate limiters and per-source circuit breakers.
+
+A page fetch that fails with a transient error (429, 5xx, connection
+error, browser crash) is retried on its own instead of re-running the
+whole scrape. Each host has a RateLimiter that spaces request starts at
+least the politeness delay apart, doubles an extra backoff on every
+transient failure (honouring Retry-After) and halves it on every success.
+Each source has a CircuitBreaker: after SCRAPER_BREAKER_FAILURES
+consecutive transient failures it opens and scrapes of that source fail
+fast with CircuitOpen until SCRAPER_BREAKER_COOLDOWN has passed, then one
+trial request decides whether it closes again.
+
+State is per worker process, like the HTTP session in fetch.
+"""
+import os
+import time
+import threading
+import logging
+
+import requests
+from selenium.common.exceptions import WebDriverException
+
+from .fetch import FetchError
+
+LOG = logging.getLogger(__name__)
+
+PAGE_ATTEMPTS = int(os.getenv('SCRAPER_PAGE_ATTEMPTS', '3'))
+BACKOFF_START = float(os.getenv('SCRAPER_BACKOFF_START', '1'))
+BACKOFF_MAX = float(os.getenv('SCRAPER_BACKOFF_MAX', '60'))
+BREAKER_FAILURES = int(os.getenv('SCRAPER_BREAKER_FAILURES', '5'))
+BREAKER_COOLDOWN = float(os.getenv('SCRAPER_BREAKER_COOLDOWN', '300'))
+
+TRANSIENT_STATUSES = {408, 425, 429}
+
+
+class CircuitOpen(Exception):
+    def __init__(self, name, retry_in):
+        super().__init__(f"circuit open for {name}, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def is_transient(exc):
+    """Whether a failed fetch is worth retrying (throttling, server errors, network or browser trouble)."""
+    if isinstance(exc, FetchError):
+        return exc.status in TRANSIENT_STATUSES or exc.status >= 500
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout, WebDriverException))
+
+
+class RateLimiter:
+    """Spaces request starts to one host and adapts the spacing to how the host responds."""
+
+    def __init__(self, host):
+        self.host = host
+        self.backoff = 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, delay, now=None):
+        """Claim the next start slot at least `delay` seconds after the previous one; returns seconds to wait."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            start = max(now, self._next_start)
+            self._next_start = start + max(delay, self.backoff)
+            return start - now
+
+    def success(self):
+        with self._lock:
+            self.backoff = self.backoff / 2 if self.backoff > BACKOFF_START else 0.0
+
+    def failure(self, retry_after=None, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.backoff = min(BACKOFF_MAX, max(self.backoff * 2, BACKOFF_START))
+            pause = self.backoff if retry_after is None else min(BACKOFF_MAX, max(retry_after, self.backoff))
+            self._next_start = max(self._next_start, now + pause)
+        LOG.info("Backing off %s for %.1fs", self.host, pause)
+
+
+class CircuitBreaker:
+    """Closed until `failures` consecutive transient failures, then open for `cooldown` seconds."""
+
+    def __init__(self, name, failures=None, cooldown=None):
+        self.name = name
+        self.failures = failures or BREAKER_FAILURES
+        self.cooldown = BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.state = "closed"
+        self._count = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def check(self, now=None):
+        """Raise CircuitOpen unless a request may go out; after the cooldown one trial is let through."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state == "closed":
+                return
+            retry_in = self._opened_at + self.cooldown - now
+            if self.state == "open" and retry_in <= 0:
+                self.state = "half-open"
+                self._trial = False
+            if self.state == "half-open" and not self._trial:
+                self._trial = True
+                return
+            raise CircuitOpen(self.name, max(retry_in, 0.0))
+
+    def success(self):
+        with self._lock:
+            if self.state != "closed":
+                LOG.info("Circuit for %s closed", self.name)
+            self.state = "closed"
+            self._count = 0
+
+    def abandon(self):
+        """A request ended without hearing from the board; let a half-open breaker send another trial."""
+        with self._lock:
+            if self.state == "half-open":
+                self._trial = False
+
+    def failure(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._count += 1
+            if self.state == "half-open" or self._count >= self.failures:
+                if self.state != "open":
+                    LOG.warning("Circuit for %s opened after %d failures", self.name, self._count)
+                self.state = "open"
+                self._opened_at = now
+                self._trial = False
+
+
+_limiters = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+def get_limiter(host):
+    with _registry_lock:
+        if host not in _limiters:
+            _limiters[host] = RateLimiter(host)
+        return _limiters[host]
+
+def get_breaker(source):
+    with _registry_lock:
+        if source not in _breakers:
+            _breakers[source] = CircuitBreaker(source)
+        return _breakers[source]
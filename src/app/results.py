@@ -0,0 +1,162 @@
+"""
+Append-only NDJSON results stream, one job posting per line.
+
+Source tasks append their postings as soon as they finish, so readers can
+page through a job's results with a byte-offset cursor while the scrape is
+still running. Match scores are stored next to it, once per job, and
+merged into the postings on read. Once a job is completed and matched,
+its full results document is encoded once and kept gzip-compressed, so
+later reads serve those bytes as they are.
+"""
+import os
+import gzip
+import logging
+from pathlib import Path
+
+from flask import current_app, has_app_context
+
+from . import codec
+from .utils import atomic_write
+
+LOG = logging.getLogger(__name__)
+
+
+def posting_key(job):
+    """Identity of a posting across pages and boards: its URL, else title + company."""
+    return job.get("url") or (job.get("title"), job.get("company"))
+
+def match_key(job):
+    """posting_key as a string, so it survives a JSON round trip."""
+    key = posting_key(job)
+    return key if isinstance(key, str) else "|".join(str(part or "") for part in key)
+
+def dedupe_postings(jobs):
+    """Drop postings already seen earlier in the list (e.g. listed on two boards)."""
+    seen = set()
+    unique = []
+    for job in jobs:
+        key = posting_key(job)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(job)
+    return unique
+
+def output_folder():
+    if has_app_context():
+        return current_app.config.get('OUTPUT_FOLDER', 'outputs')
+    return os.getenv('OUTPUT_FOLDER', 'outputs')
+
+def results_path(job_id):
+    return Path(output_folder()) / f"result_{job_id}.ndjson"
+
+def append_jobs(path, jobs):
+    """Append postings as NDJSON in a single O_APPEND write, so concurrent writers don't interleave."""
+    if not jobs:
+        return 0
+    data = b"".join(codec.dumps(j) + b"\n" for j in jobs)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+    return len(jobs)
+
+def read_raw(path, cursor=0):
+    """
+    Return (bytes, next_cursor) for the complete lines after byte offset `cursor`.
+    A cursor inside a line starts at the next line. Callers reject negative cursors.
+    """
+    start = max(cursor - 1, 0)  # one byte back, to see whether the cursor sits on a line start
+    try:
+        with open(path, 'rb') as fh:
+            fh.seek(start)
+            data = fh.read()
+    except FileNotFoundError:
+        return b"", cursor
+    if cursor > 0:
+        newline = data.find(b"\n")
+        if newline < 0:
+            return b"", cursor
+        data, start = data[newline + 1:], start + newline + 1
+    end = data.rfind(b"\n") + 1  # ignore a trailing line that is still being written
+    return data[:end], start + end
+
+def read_jobs(path, cursor=0):
+    """Return (jobs, next_cursor) for the postings after byte offset `cursor`."""
+    data, cursor = read_raw(path, cursor)
+    jobs = [codec.loads(line) for line in data.splitlines() if line.strip()]
+    return jobs, cursor
+
+
+MATCH_FIELDS = ("score", "local_score", "scored_by", "matching_skills", "skill_gaps")
+
+def matches_path(job_id):
+    return Path(output_folder()) / f"matches_{job_id}.json"
+
+def save_matches(job_id, outcome):
+    """Write a job's match outcome atomically; readers never see a partial file."""
+    atomic_write(matches_path(job_id), codec.dumps(outcome))
+
+def load_matches(job_id):
+    """The stored match outcome for a job, or None if matching hasn't finished."""
+    try:
+        with open(matches_path(job_id), 'rb') as fh:
+            return codec.loads(fh.read())
+    except (OSError, ValueError):
+        return None
+
+def apply_matches(jobs, matches):
+    """Copy stored match fields onto the postings they belong to (in place)."""
+    by_key = {m["key"]: m for m in (matches or {}).get("results", []) if "key" in m}
+    if not by_key:
+        return jobs
+    for job in jobs:
+        m = by_key.get(match_key(job))
+        if m:
+            job.update((f, m[f]) for f in MATCH_FIELDS if f in m)
+    return jobs
+
+
+def profile_path(job_id):
+    return Path(output_folder()) / f"profile_{job_id}.json"
+
+def save_profile_skills(job_id, skills):
+    """Keep the resume skills merged with the form input; the ScrapeJob row keeps what the user typed."""
+    atomic_write(profile_path(job_id), codec.dumps({"skills": list(skills)}))
+
+def load_profile_skills(job_id):
+    """The merged resume skills of a job, or None before the scrape has finished."""
+    try:
+        with open(profile_path(job_id), 'rb') as fh:
+            return codec.loads(fh.read())["skills"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def final_results_path(job_id):
+    return Path(output_folder()) / f"result_{job_id}.json.gz"
+
+def compress(raw):
+    # mtime=0 keeps the output, and so the ETag, stable for the same body
+    return gzip.compress(raw, compresslevel=6, mtime=0)
+
+def write_compressed(path, data):
+    # several web workers may encode the same completed job at once; the last complete file wins
+    atomic_write(path, data)
+
+def read_compressed(path):
+    try:
+        with open(path, 'rb') as fh:
+            return fh.read()
+    except OSError:
+        return None
+
+def delete_job_files(job_id):
+    """Remove every stored file of a job (postings stream, matches, profile, encoded results)."""
+    for path in (results_path(job_id), matches_path(job_id), profile_path(job_id), final_results_path(job_id)):
+        path.unlink(missing_ok=True)
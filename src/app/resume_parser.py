@@ -0,0 +1,100 @@
+"""
+Resume ingestion: text extraction and a compact, normalized profile.
+
+Each stored resume is parsed once; the profile is cached by content hash
+(see resume_store) so re-submissions and other queries reuse it, and
+matching only ever sees the profile, never the document.
+"""
+import os
+import re
+import zipfile
+import logging
+from xml.etree import ElementTree
+
+from .cache import TTLCache
+from .skills import find_skills
+
+LOG = logging.getLogger(__name__)
+
+# Bump when the profile format changes so stale cached profiles are ignored
+PARSER_VERSION = 3
+SUMMARY_CHARS = 1500
+
+TITLE_WORDS = ("engineer", "developer", "manager", "analyst", "scientist", "architect",
+               "consultant", "designer", "lead", "intern", "administrator")
+
+_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:years?|yrs?)", re.I)
+
+
+def extract_text(path):
+    """Plain text of a pdf/docx/doc/txt resume ('' if nothing could be extracted)."""
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    try:
+        if ext == 'pdf':
+            return _pdf_text(path)
+        if ext == 'docx':
+            return _docx_text(path)
+        with open(path, 'rb') as fh:
+            raw = fh.read()
+        if ext == 'doc':
+            # legacy binary Word: keep runs of printable text
+            return " ".join(m.decode('latin-1') for m in re.findall(rb"[\x20-\x7e]{4,}", raw))
+        return raw.decode('utf-8', errors='ignore')
+    except Exception as e:
+        LOG.warning("Failed to extract text from %s: %s", path, e)
+        return ""
+
+def _pdf_text(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        LOG.warning("pypdf not installed; cannot read %s", path)
+        return ""
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+def _docx_text(path):
+    ns = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    with zipfile.ZipFile(path) as zf:
+        root = ElementTree.fromstring(zf.read("word/document.xml"))
+    return "\n".join("".join(t.text or "" for t in p.iter(f"{ns}t")) for p in root.iter(f"{ns}p"))
+
+def parse_resume(text):
+    """Reduce resume text to the compact profile used for matching."""
+    years = [int(y) for y in _YEARS_RE.findall(text) if int(y) < 50]
+    titles = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if 3 <= len(line) <= 60 and any(w in line.lower() for w in TITLE_WORDS) and line not in titles:
+            titles.append(line)
+    return {
+        "skills": find_skills(text),
+        "years_of_experience": max(years) if years else None,
+        "titles": titles[:5],
+        "summary": " ".join(text.split())[:SUMMARY_CHARS],
+    }
+
+
+_resume_cache = None
+
+def get_resume_cache():
+    global _resume_cache
+    if _resume_cache is None:
+        _resume_cache = TTLCache(
+            "resume",
+            ttl=int(os.getenv('RESUME_CACHE_TTL', str(30 * 24 * 3600))),
+            max_bytes=int(os.getenv('RESUME_CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+        )
+    return _resume_cache
+
+def get_parsed_resume(resume_hash, path):
+    """Profile for the resume with this content hash, parsing `path` only on a cache miss."""
+    key = f"v{PARSER_VERSION}:{resume_hash}"
+    cache = get_resume_cache()
+    profile = cache.get(key)
+    if profile is None:
+        profile = parse_resume(extract_text(path))
+        profile["hash"] = resume_hash
+        cache.set(key, profile)
+        LOG.info("Parsed resume %s: %d skills", resume_hash[:12], len(profile["skills"]))
+    return profile
@@ -0,0 +1,75 @@
+"""
+Content-addressed resume storage.
+
+Uploads are streamed to disk in chunks while their SHA-256 is computed,
+then moved to UPLOAD_FOLDER/<aa>/<sha256>.<ext>. Identical resumes are
+stored once, and tasks are handed the hash and path instead of the bytes.
+"""
+import os
+import uuid
+import hashlib
+import logging
+from pathlib import Path
+
+LOG = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ResumeTooLarge(Exception):
+    pass
+
+
+class StoredResume:
+    def __init__(self, digest, path, size, hasher):
+        self.digest = digest
+        self.path = path
+        self.size = size
+        self._hasher = hasher
+
+    def hash_with(self, suffix: bytes) -> str:
+        """sha256(resume bytes + suffix), without re-reading the file."""
+        h = self._hasher.copy()
+        h.update(suffix)
+        return h.hexdigest()
+
+
+def relative_path(digest, ext):
+    return f"{digest[:2]}/{digest}.{ext}"
+
+def store_upload(stream, ext, upload_folder, max_bytes):
+    """
+    Stream `stream` into the store. Raises ResumeTooLarge past `max_bytes`.
+
+    Re-uploading content that is already stored just refreshes the file's
+    mtime, which is what retention uses to decide when it can go.
+    """
+    folder = Path(upload_folder)
+    tmp_dir = folder / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_dir / uuid.uuid4().hex
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp, 'wb') as fh:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResumeTooLarge()
+                hasher.update(chunk)
+                fh.write(chunk)
+
+        digest = hasher.hexdigest()
+        final = folder / relative_path(digest, ext)
+        if final.exists():
+            os.utime(final)
+            LOG.info("Resume %s already stored", digest[:12])
+        else:
+            final.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, final)
+        return StoredResume(digest, str(final), size, hasher)
+    finally:
+        tmp.unlink(missing_ok=True)
@@ -0,0 +1,87 @@
+"""
+Retention sweeper for stored resumes and result files.
+
+Runs periodically from Celery beat instead of one countdown task per
+upload: walks UPLOAD_FOLDER and OUTPUT_FOLDER once, picks files whose
+mtime is past their retention (a resume re-upload refreshes its mtime, see
+resume_store) and deletes them in batches. Every sweep logs what it found
+and freed; a dry run only reports.
+"""
+import os
+import time
+import logging
+
+from flask import current_app
+
+LOG = logging.getLogger(__name__)
+
+SWEEP_BATCH_SIZE = 500
+
+
+def _expired(folder, max_age, now):
+    """Yield (path, size) for files under `folder` not modified for `max_age` seconds."""
+    cutoff = now - max_age
+    stack = [folder]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if st.st_mtime < cutoff:
+                    yield entry.path, st.st_size
+
+def sweep(folder, max_age, batch_size=SWEEP_BATCH_SIZE, dry_run=False, now=None):
+    """Delete files under `folder` older than `max_age` seconds. Returns counts for logging."""
+    stats = {"expired": 0, "deleted": 0, "bytes": 0, "errors": 0}
+    batch = []
+
+    def flush():
+        for path, size in batch:
+            if dry_run:
+                continue
+            try:
+                os.unlink(path)
+                stats["deleted"] += 1
+                stats["bytes"] += size
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                stats["errors"] += 1
+                LOG.warning("Failed to delete %s: %s", path, e)
+        batch.clear()
+
+    for path, size in _expired(folder, max_age, now or time.time()):
+        stats["expired"] += 1
+        if dry_run:
+            stats["bytes"] += size
+        batch.append((path, size))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return stats
+
+def sweep_all(dry_run=False):
+    """Apply resume and result retention. Returns {"resumes": stats, "results": stats}."""
+    config = current_app.config
+    started = time.monotonic()
+    report = {
+        "resumes": sweep(config['UPLOAD_FOLDER'], config.get('RESUME_RETENTION_SECONDS', 7 * 24 * 3600),
+                         dry_run=dry_run),
+        "results": sweep(config['OUTPUT_FOLDER'], config.get('RESULT_RETENTION_SECONDS', 30 * 24 * 3600),
+                         dry_run=dry_run),
+    }
+    for kind, stats in report.items():
+        LOG.info("Retention sweep%s: %s expired=%d deleted=%d freed=%.1fMB errors=%d",
+                 " (dry run)" if dry_run else "", kind, stats["expired"], stats["deleted"],
+                 stats["bytes"] / 1e6, stats["errors"])
+    LOG.info("Retention sweep took %.2fs", time.monotonic() - started)
+    return report
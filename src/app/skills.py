@@ -0,0 +1,116 @@
+"""
+Skill taxonomy and an inverted index from skill to postings.
+
+Every known skill has a canonical name, optional aliases and a bit
+position, so a set of skills is a single int bitmask. Postings are tagged
+with their skills once, when they are scraped; matching skills and gaps
+for a resume are then a couple of bitwise operations per posting, and the
+index answers "how many postings want X" without touching the text again.
+"""
+import re
+
+# canonical name -> aliases; order fixes the bit positions, append only
+TAXONOMY = {
+    "python": (), "java": (), "javascript": ("js", "ecmascript"), "typescript": (),
+    "go": ("golang",), "rust": (), "c++": ("cpp",), "c#": ("csharp", ".net", "dotnet"),
+    "ruby": (), "php": (), "scala": (), "kotlin": (),
+    "sql": (), "postgresql": ("postgres",), "mysql": (), "mongodb": ("mongo",), "redis": (),
+    "elasticsearch": ("elastic search",),
+    "django": (), "flask": (), "fastapi": (), "spring": ("spring boot",), "node.js": ("nodejs", "node"),
+    "react": ("reactjs", "react.js"), "angular": ("angularjs",), "vue": ("vue.js", "vuejs"),
+    "aws": ("amazon web services",), "azure": (), "gcp": ("google cloud",), "docker": (),
+    "kubernetes": ("k8s",), "terraform": (), "ci/cd": ("cicd", "ci-cd"), "linux": (), "git": (),
+    "spark": ("pyspark",), "hadoop": (), "kafka": (), "airflow": (), "pandas": (), "numpy": (),
+    "machine learning": ("ml",), "deep learning": (), "tensorflow": (), "pytorch": (),
+    "nlp": ("natural language processing",), "llm": ("llms", "large language models"),
+}
+SKILLS = tuple(TAXONOMY)
+BITS = {skill: 1 << i for i, skill in enumerate(SKILLS)}
+
+_WORD_CHARS = r"[a-z0-9+#./]"
+_ALIASES = {alias: skill for skill, aliases in TAXONOMY.items() for alias in (skill,) + aliases}
+# one alternation, longest names first so "spring boot" wins over "spring"
+_SKILL_RE = re.compile(
+    rf"(?<!{_WORD_CHARS})("
+    + "|".join(re.escape(a) for a in sorted(_ALIASES, key=len, reverse=True))
+    + rf")(?!{_WORD_CHARS})"
+)
+
+
+# Bare names that are also everyday words ("ready to go", "node", "spring"). In free text they
+# only count next to another skill, or in their usual tech spelling mid-sentence ("in Go").
+AMBIGUOUS = {"go": "Go", "node": None, "spring": None}
+CONTEXT_CHARS = 30
+
+
+def _in_context(text, match, spans):
+    start, end = match.span()
+    if text[end:end + 1] == "-":  # "go-getter", "spring-loaded"
+        return False
+    if any(s < end + CONTEXT_CHARS and e > start - CONTEXT_CHARS for s, e in spans):
+        return True
+    cased = AMBIGUOUS[match.group(1)]
+    before = text[:start].rstrip()
+    return bool(cased) and text[start:end] == cased and bool(before) and before[-1] not in ".!?:;\n"
+
+def to_mask(skills):
+    mask = 0
+    for skill in skills or ():
+        mask |= BITS.get(_ALIASES.get(skill.strip().lower(), ""), 0)
+    return mask
+
+def from_mask(mask):
+    return [skill for skill in SKILLS if mask & BITS[skill]]
+
+def find_skills(text):
+    """Canonical skills mentioned in `text`, in taxonomy order."""
+    text = text or ""
+    matches = list(_SKILL_RE.finditer(text.lower()))
+    spans = [m.span() for m in matches if m.group(1) not in AMBIGUOUS]
+    mask = 0
+    for m in matches:
+        if m.group(1) in AMBIGUOUS and not _in_context(text, m, spans):
+            continue
+        mask |= BITS[_ALIASES[m.group(1)]]
+    return from_mask(mask)
+
+def posting_skills(job):
+    return find_skills(" ".join(str(job.get(f) or "") for f in ("title", "description", "experience")))
+
+
+class SkillIndex:
+    """Postings' skill bitmasks plus, per skill, a bitset of the postings that want it."""
+
+    def __init__(self):
+        self.masks = []
+        self.postings = {}
+
+    @classmethod
+    def from_jobs(cls, jobs):
+        index = cls()
+        for job in jobs:
+            index.add(job.get("skills") if "skills" in job else posting_skills(job))
+        return index
+
+    def add(self, skills):
+        ref = len(self.masks)
+        mask = to_mask(skills)
+        self.masks.append(mask)
+        for skill in from_mask(mask):
+            self.postings[skill] = self.postings.get(skill, 0) | (1 << ref)
+        return ref
+
+    def count(self, skill):
+        return self.postings.get(skill, 0).bit_count()
+
+    def compare(self, resume_skills):
+        """(matching skills, gaps) for every posting, in insertion order."""
+        have = to_mask(resume_skills)
+        return [(from_mask(mask & have), from_mask(mask & ~have)) for mask in self.masks]
+
+    def top_gaps(self, resume_skills, limit=10):
+        """Skills the resume lacks, with how many postings ask for them, most wanted first."""
+        have = to_mask(resume_skills)
+        gaps = [(skill, self.count(skill)) for skill in self.postings if not have & BITS[skill]]
+        gaps.sort(key=lambda g: (-g[1], SKILLS.index(g[0])))
+        return [{"skill": s, "postings": n} for s, n in gaps[:limit]]
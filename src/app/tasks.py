@@ -7,12 +7,27 @@ This version configures Celery either:
  - from environment variables when run in the celery worker process.
 """
 import os
-import json
+import sys
 import logging
 from celery import Celery
+from celery.signals import worker_process_shutdown
+from flask import has_app_context
+
+from .codec import CELERY_SERIALIZER, register_celery_serializer
 
 LOG = logging.getLogger(__name__)
 celery = Celery(__name__)
+register_celery_serializer()
+
+@worker_process_shutdown.connect
+def _close_browsers(**kwargs):
+    # prefork children leave with os._exit, so the pool's atexit hook never runs there
+    scraper = sys.modules.get(f"{__package__}.scraper")
+    if scraper is not None:
+        scraper.close_driver_pool()
+
+# Per-source scrape budget; a source that runs over is dropped from the merge
+SOURCE_TIME_LIMIT = int(os.getenv('SCRAPER_SOURCE_TIME_LIMIT', '120'))
 
 def init_celery(app=None):
     """
@@ -30,14 +45,19 @@ def init_celery(app=None):
         backend = app.config.get('CELERY_RESULT_BACKEND')
         celery.conf.broker_url = broker
         celery.conf.result_backend = backend
-        celery.conf.task_serializer = 'json'
+        _configure_serializer()
         celery.conf.result_expires = app.config.get('CELERY_RESULT_EXPIRES', 3600)
         celery.conf.task_always_eager = app.config.get('CELERY_ALWAYS_EAGER', True)
         celery.conf.task_eager_propagates = True
+        _configure_beat(app.config.get('GUEST_PURGE_INTERVAL_SECONDS', 3600),
+                        app.config.get('RETENTION_SWEEP_INTERVAL_SECONDS', 3600))
+        _configure_routing(app.config.get('CELERY_PREFETCH_MULTIPLIER', 1))
 
-        # Ensure tasks run with Flask app context
+        # Ensure tasks run with Flask app context (eager calls reuse the caller's)
         class ContextTask(celery.Task):
             def __call__(self, *args, **kwargs):
+                if has_app_context():
+                    return super().__call__(*args, **kwargs)
                 with app.app_context():
                     return super().__call__(*args, **kwargs)
         celery.Task = ContextTask
@@ -54,24 +74,102 @@ def init_celery(app=None):
         celery.conf.result_backend = backend_env
 
     # sensible defaults if env not set
-    celery.conf.task_serializer = 'json'
+    _configure_serializer()
     celery.conf.result_expires = int(os.getenv('CELERY_RESULT_EXPIRES', '3600'))
     celery.conf.task_always_eager = os.getenv('CELERY_ALWAYS_EAGER', 'true').lower() in ('true', '1')
     celery.conf.task_eager_propagates = True
+    _configure_beat(int(os.getenv('GUEST_PURGE_INTERVAL_SECONDS', '3600')),
+                    int(os.getenv('RETENTION_SWEEP_INTERVAL_SECONDS', '3600')))
+    _configure_routing(int(os.getenv('CELERY_PREFETCH_MULTIPLIER', '1')))
 
     LOG.info("Celery initialized from environment: broker=%s (eager=%s)", celery.conf.broker_url, celery.conf.task_always_eager)
     return celery
 
 
+def _configure_serializer():
+    # task messages and results go through the fast codec; plain json is still accepted
+    celery.conf.task_serializer = CELERY_SERIALIZER
+    celery.conf.result_serializer = CELERY_SERIALIZER
+    celery.conf.accept_content = [CELERY_SERIALIZER, 'json']
+
+
+def _configure_beat(guest_purge_interval, retention_sweep_interval):
+    # periodic housekeeping, run by `celery beat`
+    celery.conf.beat_schedule = {
+        'purge-expired-guests': {'task': purge_guests.name, 'schedule': guest_purge_interval},
+        'sweep-retention': {'task': sweep_retention.name, 'schedule': retention_sweep_interval},
+    }
+
+
+def _configure_routing(prefetch_multiplier):
+    """
+    One queue per kind of work, so each worker tier can be sized for it
+    (see docker-compose.yml): browser scrapes on `scraping`, LLM calls on
+    `matching`, periodic cleanup on `housekeeping`, the rest on `default`.
+    """
+    celery.conf.task_default_queue = 'default'
+    celery.conf.task_routes = {
+        scrape_source_task.name: {'queue': 'scraping'},
+        match_jobs_with_gpt.name: {'queue': 'matching'},
+        sweep_retention.name: {'queue': 'housekeeping'},
+        reconcile_quota.name: {'queue': 'housekeeping'},
+        purge_guests.name: {'queue': 'housekeeping'},
+    }
+    # ack after the task finishes so a crashed worker's task is redelivered, and
+    # don't let one busy worker hoard messages another tier member could run
+    celery.conf.task_acks_late = True
+    celery.conf.task_reject_on_worker_lost = True
+    celery.conf.worker_prefetch_multiplier = prefetch_multiplier
+
+
+def _set_progress(scrape_job_id, progress, status='running', **extra):
+    """
+    Record a progress step. Intermediate steps only go to the Redis hot
+    state (which also publishes them as events); terminal states, and every
+    step when Redis is unavailable, are written to the ScrapeJob row too.
+    """
+    from . import db
+    from .models import ScrapeJob
+    from .events import TERMINAL_STATUSES
+    from .progress import set_state
+
+    if set_state(scrape_job_id, status=status, progress=progress, **extra) and status not in TERMINAL_STATUSES:
+        return
+    job = ScrapeJob.query.get(scrape_job_id)
+    if job:
+        job.status = status
+        job.progress = progress
+        if extra.get('results_path'):
+            job.results_path = extra['results_path']
+        db.session.commit()
+
+
+def _apply_form_profile(resume, job):
+    """Overlay the experience and skills the user typed into the form onto the parsed profile."""
+    resume = dict(resume)
+    if job.years_of_experience is not None:
+        resume["years_of_experience"] = job.years_of_experience
+    extra = [s.strip().lower() for s in (job.skills or "").split(",") if s.strip()]
+    resume["skills"] = list(dict.fromkeys(resume.get("skills", []) + extra))
+    return resume
+
+
+def _mark_failed(scrape_job_id):
+    try:
+        _set_progress(scrape_job_id, 0, status='failed')
+    except Exception as db_exc:
+        LOG.error("Failed to update job status on error: %s", db_exc)
+
+
 @celery.task(bind=True)
-def async_scrape_and_match(self, scrape_job_id, user_id, job_titles, location, resume_bytes, resume_filename, years_of_experience=None, skills=None):
+def async_scrape_and_match(self, scrape_job_id, user_id, job_titles, location, resume_hash, resume_filename, years_of_experience=None, skills=None):
     LOG.info("Task started for scrape_job_id=%s user_id=%s job_titles=%s", scrape_job_id, user_id, job_titles)
 
     # Lazy imports (avoid import-time circular deps)
-    from . import db
-    from .models import ScrapeJob, User
-    from .scraper import scrape_naukri
-    from pathlib import Path
+    from celery import chord
+    from .models import ScrapeJob
+    from .scraper import enabled_sources
+    from .results import results_path, matches_path, profile_path, final_results_path
 
     try:
         # Fetch the ScrapeJob record (already created by API endpoint)
@@ -80,77 +178,149 @@ def async_scrape_and_match(self, scrape_job_id, user_id, job_titles, location, r
             LOG.error("ScrapeJob not found: %s", scrape_job_id)
             return {"status": "error", "job_id": scrape_job_id, "message": "scrape_job_not_found"}
 
-        # Update progress: 25% (job started)
-        job.progress = 25
-        job.status = 'running'
-        db.session.commit()
+        # Update progress: 25% (job started); results stream readable from now on
+        out_path = results_path(job.id)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.unlink(missing_ok=True)
+        matches_path(job.id).unlink(missing_ok=True)
+        profile_path(job.id).unlink(missing_ok=True)
+        final_results_path(job.id).unlink(missing_ok=True)
+        _set_progress(job.id, 25, results_path=str(out_path))
         LOG.info("Progress: 25%% - job started")
 
-        # Call scraper to extract jobs from job board
-        # Replace with real scrapers in production. This may call Selenium (ensure chromedriver).
-        jobs = scrape_naukri(job_titles, location, max_pages=2)
-        LOG.info("Scraped %d jobs for %s in %s", len(jobs), job_titles, location)
+        # Fan out one subtask per enabled source, plus resume ingestion alongside them;
+        # the chord callback runs once all have returned
+        sources = enabled_sources()
+        header = [scrape_source_task.s(scrape_job_id, name, job_titles, location, 2, str(out_path)) for name in sources]
+        header.append(ingest_resume.s(resume_hash, resume_filename))
+        callback = merge_and_match.s(scrape_job_id, job_titles, location, resume_hash, resume_filename)
+        chord(header)(callback)
+        LOG.info("Scraping %s for job %s", ", ".join(sources), scrape_job_id)
+
+        return {"status": "ok", "job_id": scrape_job_id, "sources": sources}
+
+    except Exception as exc:
+        LOG.exception("Task failed: %s", exc)
+        _mark_failed(scrape_job_id)
+        raise
+
+
+@celery.task(soft_time_limit=SOURCE_TIME_LIMIT, time_limit=SOURCE_TIME_LIMIT + 30)
+def scrape_source_task(scrape_job_id, source, job_titles, location, max_pages, out_path):
+    """
+    Scrape one job board and append its postings to the job's results stream.
+
+    Never raises, so a failing or slow source can't fail the chord: it
+    reports a zero count with the error instead. Only the count travels
+    back through the result backend, the postings stay on disk.
+    """
+    from celery.exceptions import SoftTimeLimitExceeded
+    from .scraper import scrape_source
+    from .results import append_jobs
+    from .progress import set_state
+    from .skills import posting_skills
+
+    try:
+        jobs = scrape_source(source, job_titles, location, max_pages=max_pages)
+        for job in jobs:
+            job["skills"] = posting_skills(job)  # tagged once here, read by the skill index
+        if append_jobs(out_path, jobs):
+            set_state(scrape_job_id, status='running', has_results=True)
+        LOG.info("Scraped %d jobs for %s in %s from %s", len(jobs), job_titles, location, source)
+        return {"source": source, "count": len(jobs)}
+    except SoftTimeLimitExceeded:
+        LOG.warning("Source %s timed out after %ss", source, SOURCE_TIME_LIMIT)
+        return {"source": source, "count": 0, "error": "timeout"}
+    except Exception as exc:
+        LOG.exception("Source %s failed: %s", source, exc)
+        return {"source": source, "count": 0, "error": str(exc)}
+
+
+@celery.task
+def ingest_resume(resume_hash, resume_path):
+    """Parse the resume into a compact profile (cached by content hash). Never raises."""
+    from .resume_parser import get_parsed_resume
+
+    try:
+        return {"resume": get_parsed_resume(resume_hash, resume_path)}
+    except Exception as exc:
+        LOG.exception("Resume ingestion failed for %s: %s", resume_hash, exc)
+        return {"resume": None, "error": str(exc)}
+
+
+@celery.task(bind=True)
+def merge_and_match(self, header_results, scrape_job_id, job_titles, location, resume_hash, resume_filename):
+    """Chord callback: once every source has streamed its postings, queue matching and finish the job."""
+    from .models import ScrapeJob
+    from .results import read_jobs, dedupe_postings, results_path, save_profile_skills
+
+    try:
+        job = ScrapeJob.query.get(scrape_job_id)
+        if not job:
+            LOG.error("ScrapeJob not found: %s", scrape_job_id)
+            return {"status": "error", "job_id": scrape_job_id, "message": "scrape_job_not_found"}
+
+        source_results = [r for r in header_results if "source" in r]
+        resume = next((r["resume"] for r in header_results if "resume" in r), None) or {}
+        resume = _apply_form_profile(resume, job)
+
+        out_path = results_path(job.id)
+        jobs, _ = read_jobs(out_path)
+        jobs = dedupe_postings(jobs)
+        LOG.info("Merged %d jobs from %s", len(jobs),
+                 ", ".join(f"{r['source']}={r.get('error', r['count'])}" for r in source_results))
 
         # Update progress: 60% (scraping completed)
-        job.progress = 60
-        db.session.commit()
+        _set_progress(job.id, 60)
         LOG.info("Progress: 60%% - scraping completed")
 
-        # Convert jobs to JSON for OpenAI matching
-        jobs_json = json.dumps(jobs, indent=2)
-        
-        # Queue GPT matching task (non-blocking, runs in background)
-        match_jobs_with_gpt.apply_async(args=[job.id, jobs_json, resume_bytes], countdown=1)
+        # Queue GPT matching task (non-blocking, runs in background); it reads the postings from disk
+        match_jobs_with_gpt.apply_async(args=[job.id, str(out_path), resume], countdown=1)
 
         # Update progress: 90% (matching queued)
-        job.progress = 90
-        db.session.commit()
+        _set_progress(job.id, 90)
         LOG.info("Progress: 90%% - OpenAI matching task queued")
 
-        # Write intermediate results (unscored jobs) to output folder
-        out_dir = Path(os.getenv('OUTPUT_FOLDER', 'outputs'))
-        out_dir.mkdir(parents=True, exist_ok=True)
-        out_path = out_dir / f"result_{job.id}.json"
-        with open(out_path, 'w', encoding='utf-8') as fh:
-            json.dump({"jobs": jobs, "query": job_titles, "location": location}, fh, indent=2)
+        # Normalized copy of the postings, shared across scrapes; the NDJSON stream stays the read path
+        try:
+            from . import db
+            from .postings import upsert_postings
+            upsert_postings(job.id, jobs)
+        except Exception as exc:
+            LOG.warning("Failed to store postings for job %s: %s", job.id, exc)
+            db.session.rollback()
+            job = ScrapeJob.query.get(scrape_job_id)
+
+        # Keep the merged resume skills next to the results for skill-gap analysis
+        skills = resume.get("skills", [])
+        save_profile_skills(job.id, skills)
 
-        job.results_path = str(out_path)
-        
         # Update progress: 100% (completed)
-        job.progress = 100
-        job.status = 'completed'
-        db.session.commit()
+        _set_progress(job.id, 100, status='completed', results_path=str(out_path), skills=",".join(skills))
         LOG.info("Progress: 100%% - task completed for job %s", job.id)
 
-        # Schedule auto-delete of uploaded resume (7 days)
-        auto_delete_resume.apply_async(args=[resume_filename], countdown=3600*24*7)
-
         return {"status": "ok", "job_id": job.id, "jobs_count": len(jobs)}
 
     except Exception as exc:
         LOG.exception("Task failed: %s", exc)
-        try:
-            job = ScrapeJob.query.get(scrape_job_id)
-            if job:
-                job.status = 'failed'
-                job.progress = 0
-                db.session.commit()
-        except Exception as db_exc:
-            LOG.error("Failed to update job status on error: %s", db_exc)
+        _mark_failed(scrape_job_id)
         raise
 
 @celery.task
-def match_jobs_with_gpt(job_id, jobs_json):
+def match_jobs_with_gpt(job_id, results_path, resume=None):
     """
     Match jobs with resume using GPT-4 Turbo.
-    Reads resume from ScrapeJob record, performs server-side analysis.
+    Reads the postings from the job's results stream, ranks them all locally
+    and sends the top MATCH_TOP_K to the model in token-budgeted batches.
+    `resume` is the compact profile from resume ingestion, not the document.
     """
     LOG.info("Starting GPT matching for job_id=%s", job_id)
     
     try:
-        from . import db
         from .models import ScrapeJob, User
         from .utils import decrypt_key
+        from .results import read_jobs, dedupe_postings, match_key, save_matches
+        from .matching import rank_and_match, get_match_cache
         from openai import OpenAI
         from flask import current_app
         import os
@@ -174,55 +344,72 @@ def match_jobs_with_gpt(job_id, jobs_json):
             except Exception as e:
                 LOG.warning("Failed to decrypt user's OpenAI key: %s", e)
         
-        if not openai_key:
-            LOG.error("No OpenAI API key available for user %s", user.id)
-            return {"status": "error", "message": "no_openai_key"}
-        
-        # Initialize OpenAI client
-        client = OpenAI(api_key=openai_key)
-        
-        # Call GPT-4 for job matching
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a job matching assistant. Analyze the provided resume against job postings. "
-                              "For each job, provide a match score (0-100), top 3 matching skills, and top 3 skill gaps. "
-                              "Return the response as valid JSON with array of {title, score, matching_skills, skill_gaps}."
-                },
-                {
-                    "role": "user",
-                    "content": f"Please analyze these job postings:\n\n{jobs_json}"
-                }
-            ],
-            temperature=0.3
+        client = None
+        if openai_key:
+            # Initialize OpenAI client (OPENAI_BASE_URL points it at any compatible server)
+            client = OpenAI(
+                api_key=openai_key,
+                base_url=current_app.config.get('OPENAI_BASE_URL') or None,
+                max_retries=current_app.config.get('OPENAI_MAX_RETRIES', 2),
+            )
+        else:
+            LOG.warning("No OpenAI API key available for user %s; ranking locally only", user.id)
+
+        jobs, _ = read_jobs(results_path)
+        jobs = dedupe_postings(jobs)
+        outcome = rank_and_match(
+            client,
+            current_app.config.get('OPENAI_MODEL', 'gpt-4-turbo-preview'),
+            resume,
+            jobs,
+            top_k=current_app.config.get('MATCH_TOP_K', 20),
+            budget_tokens=current_app.config.get('MATCH_BATCH_TOKENS', 6000),
+            max_in_flight=current_app.config.get('MATCH_MAX_IN_FLIGHT', 4),
+            cache=get_match_cache(),
         )
-        
-        result_text = response.choices[0].message.content
-        
-        # Try to parse as JSON
-        try:
-            match_results = json.loads(result_text)
-        except json.JSONDecodeError:
-            # If not valid JSON, store as string for manual review
-            match_results = {"raw_response": result_text}
-        
+        for m in outcome["results"]:
+            m["key"] = match_key(jobs[m["ref"]])
+
+        # Stored with the results so reloads never re-run matching or depend on the result backend
+        save_matches(job_id, {"status": "ok", "job_id": job_id, **outcome})
         LOG.info("GPT matching completed for job_id=%s", job_id)
-        return {"status": "ok", "job_id": job_id, "results": match_results}
+        return {"status": "ok", "job_id": job_id, "matched": len(outcome["results"])}
         
     except Exception as e:
         LOG.exception("Error in match_jobs_with_gpt: %s", e)
+        try:
+            save_matches(job_id, {"status": "error", "job_id": job_id, "message": str(e)})
+        except Exception:
+            pass
         return {"status": "error", "message": str(e)}
 
 @celery.task
-def auto_delete_resume(filename):
-    from pathlib import Path
+def sweep_retention(dry_run=False):
+    """Periodic: delete resumes and result files past their retention, in batches."""
+    from .retention import sweep_all
+    try:
+        return sweep_all(dry_run=dry_run)
+    except Exception as e:
+        LOG.exception("Retention sweep failed: %s", e)
+        return None
+
+@celery.task
+def reconcile_quota(user_id):
+    """Bring a user's monthly quota counter in line with the ScrapeJob rows."""
+    from .quota import reconcile
+    try:
+        return reconcile(user_id)
+    except Exception as e:
+        LOG.exception("Failed to reconcile quota for user %s: %s", user_id, e)
+        return None
+
+
+@celery.task
+def purge_guests():
+    """Periodic: delete expired guest users and their jobs in batches."""
+    from .guests import purge_expired_guests
     try:
-        p = Path(filename)
-        if p.exists():
-            p.unlink()
-            return True
+        return purge_expired_guests()
     except Exception as e:
-        LOG.exception("Failed to delete resume %s: %s", filename, e)
-    return False
+        LOG.exception("Guest purge failed: %s", e)
+        return 0
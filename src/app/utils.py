@@ -2,6 +2,8 @@ import hashlib
 import base64
 from cryptography.fernet import Fernet
 import os
+import tempfile
+from flask import current_app, has_app_context
 
 def hash_file_bytes(b: bytes) -> str:
     h = hashlib.sha256()
@@ -21,3 +23,41 @@ def encrypt_key(plain: str, fernet_key: str) -> bytes:
 def decrypt_key(token: bytes, fernet_key: str) -> str:
     f = get_fernet(fernet_key)
     return f.decrypt(token).decode()
+
+
+_redis_clients = {}
+
+def get_redis(url=None):
+    """Shared Redis client for REDIS_URL (app config, else environment), or None when Redis isn't configured."""
+    if url is None and has_app_context() and 'REDIS_URL' in current_app.config:
+        url = current_app.config['REDIS_URL']
+    url = url or os.getenv('REDIS_URL')
+    if not url:
+        return None
+    client = _redis_clients.get(url)
+    if client is None:
+        import redis
+        client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        _redis_clients[url] = client
+    return client
+
+
+def atomic_write(path, data):
+    """
+    Write `data` (bytes) to `path` via a uniquely named temp file in the same
+    directory, so concurrent writers never share a temp file and readers only
+    ever see a complete file.
+    """
+    folder = os.path.dirname(os.fspath(path)) or '.'
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
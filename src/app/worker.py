@@ -0,0 +1,10 @@
+"""
+Celery worker / beat entry point: `celery -A src.app.worker.celery worker -Q <queue>`.
+
+Builds the Flask app first so tasks run inside its application context
+with its configuration (database, routing, serializer).
+"""
+from . import create_app
+
+app = create_app()
+celery = app.celery
@@ -0,0 +1,338 @@
+import io
+import json
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import ScrapeJob, User
+
+
+def upload(client, content=b"resume text", **form):
+    data = {"resume": (io.BytesIO(content), "resume.txt"), "job_titles": "python developer", "location": "bangalore"}
+    data.update(form)
+    return client.post("/upload", data=data, content_type="multipart/form-data")
+
+
+def job_postings_count():
+    from app.models import JobPosting
+    return JobPosting.query.count()
+
+
+def add_job(**fields):
+    user = User(email=f"u{User.query.count()}@example.com")
+    db.session.add(user)
+    db.session.commit()
+    job = ScrapeJob(user_id=user.id, **fields)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_upload_reuses_recent_duplicate(client, app):
+    first = upload(client).get_json()["task_id"]
+
+    res = upload(client)
+    assert res.status_code == 202
+    assert res.get_json() == {"task_id": first, "deduplicated": True}
+    assert ScrapeJob.query.count() == 1
+
+    # edited form fields and other users get a job of their own
+    assert "deduplicated" not in upload(client, skills="go, kubernetes").get_json()
+    other = app.test_client().post("/upload", data={"resume": (io.BytesIO(b"resume text"), "resume.txt"),
+                                                    "job_titles": "python developer", "location": "bangalore"},
+                                   content_type="multipart/form-data")
+    assert "deduplicated" not in other.get_json()
+    assert ScrapeJob.query.count() == 3
+
+
+def test_upload_ignores_stale_or_failed_duplicates(app):
+    from app.api import find_recent_duplicate
+
+    user_id = add_job(status="failed", dedup_hash="h").user_id
+    db.session.add(ScrapeJob(user_id=user_id, status="completed", dedup_hash="h",
+                             created_at=datetime.utcnow() - timedelta(days=1)))
+    db.session.commit()
+    assert find_recent_duplicate("h", user_id) is None
+    fresh = ScrapeJob(user_id=user_id, status="running", dedup_hash="h")
+    db.session.add(fresh)
+    db.session.commit()
+    assert find_recent_duplicate("h", user_id).id == fresh.id
+    assert find_recent_duplicate("h", user_id + 1) is None
+
+
+def test_results_readable_with_cursor_while_running(client, app):
+    from app.results import append_jobs, results_path
+
+    job = add_job(status="running", job_titles="python", location="pune")
+    path = results_path(job.id)
+    job.results_path = str(path)
+    db.session.commit()
+    append_jobs(path, [{"title": "A", "url": "u1"}])
+
+    assert client.get(f"/task/{job.id}/results").status_code == 202
+    first = client.get(f"/task/{job.id}/results?cursor=0").get_json()
+    assert [j["title"] for j in first["jobs"]] == ["A"]
+    assert first["done"] is False
+
+    append_jobs(path, [{"title": "B", "url": "u2"}])
+    with open(path, "ab") as fh:
+        fh.write(b'{"title": "half-writ')  # partial line from a writer mid-append
+    second = client.get(f"/task/{job.id}/results?cursor={first['cursor']}").get_json()
+    assert [j["title"] for j in second["jobs"]] == ["B"]
+    assert second["matching"] == "pending"
+    # a cursor inside a line starts at the next one; negative or past-the-end cursors are rejected
+    mid = client.get(f"/task/{job.id}/results?cursor={first['cursor'] - 3}").get_json()
+    assert [j["title"] for j in mid["jobs"]] == ["B"] and mid["cursor"] == second["cursor"]
+    for bad in ("cursor=-5", "stream=1&cursor=-5", "cursor=999999"):
+        assert client.get(f"/task/{job.id}/results?{bad}").status_code == 400
+
+    job.status = "failed"
+    db.session.commit()
+    assert client.get(f"/task/{job.id}/results?cursor=0").get_json()["matching"] == "skipped"
+
+    job.status = "completed"
+    db.session.commit()
+    streamed = client.get(f"/task/{job.id}/results?stream=1")
+    assert streamed.mimetype == "application/x-ndjson"
+    assert streamed.data.count(b"\n") == 2
+    resumed = client.get(f"/task/{job.id}/results?stream=1&cursor={first['cursor']}")
+    assert [json.loads(line)["title"] for line in resumed.data.splitlines()] == ["B"]
+
+
+def test_events_unavailable_without_redis(client, monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    job = add_job(status="running")
+    res = client.get(f"/task/{job.id}/events")
+    assert res.status_code == 503  # analyzing.html falls back to polling
+
+
+def test_upload_runs_pipeline_with_parsed_resume(client, app):
+    from app.resume_parser import PARSER_VERSION, get_resume_cache
+
+    res = upload(client, content=b"Senior Python Developer\n6+ years building Django and AWS services")
+    assert res.status_code == 202
+    task_id = res.get_json()["task_id"]
+    assert client.get(f"/task/{task_id}/status").get_json()["status"] == "completed"
+    body = client.get(f"/task/{task_id}/results").get_json()
+    assert len(body["jobs"]) == 5
+    backend = next(j for j in body["jobs"] if j["title"] == "Senior Backend Engineer")
+    assert backend["matching_skills"] == ["python", "django"] and backend["gaps"] == []
+    assert body["skill_gaps"][0] == {"skill": "sql", "postings": 1}
+    # no OpenAI key in tests: matching stores the local ranking, merged into the results
+    assert body["matching"] == "ok"
+    assert job_postings_count() == 5
+    assert all(j["scored_by"] == "local" for j in body["jobs"])
+    assert all("score" not in j for j in body["jobs"])  # a local rank is not a match percentage
+    assert max(body["jobs"], key=lambda j: j["local_score"])["title"] == "Senior Backend Engineer"
+
+    job = ScrapeJob.query.get(task_id)
+    assert job.skills == ""  # the form input is kept as typed; merged skills live next to the results
+    digest = job.resume_filename.rsplit("/", 1)[1].split(".")[0]
+    profile = get_resume_cache().get(f"v{PARSER_VERSION}:{digest}")
+    assert profile["skills"] == ["python", "django", "aws"]
+    assert profile["years_of_experience"] == 6
+    assert profile["titles"] == ["Senior Python Developer"]
+
+
+def test_openai_match_proxy_serves_stored_matches(client, app, monkeypatch):
+    from app import tasks
+
+    res = upload(client)
+    task_id = res.get_json()["task_id"]
+    calls = []
+    monkeypatch.setattr(tasks.match_jobs_with_gpt, "apply_async", lambda *a, **k: calls.append(a))
+
+    first = client.post("/proxy/openai_match", json={"job_id": task_id})
+    assert first.status_code == 200
+    body = first.get_json()
+    assert body["status"] == "ok" and len(body["results"]) == 5
+    assert client.post("/proxy/openai_match", json={"job_id": task_id}).get_json() == body
+    assert calls == []
+
+    assert client.post("/proxy/openai_match", json={"job_id": 999}).status_code == 404
+
+
+def test_postings_are_upserted_once_and_linked(app):
+    from app import db
+    from app.models import JobPosting
+    from app.postings import canonical_url, upsert_postings
+
+    assert canonical_url("HTTPS://Example.com/jobs/1/?utm_source=x&b=2&a=1#top") == "https://example.com/jobs/1?a=1&b=2"
+
+    first, second = add_job(), add_job()
+    jobs = [{"title": "Dev", "url": "https://example.com/jobs/1?utm_source=a", "skills": ["python"]},
+            {"title": "Ops", "company": "Acme"}]
+    ids = upsert_postings(first.id, jobs, batch_size=1)
+    again = upsert_postings(second.id, [{"title": "Dev v2", "url": "https://example.com/jobs/1/"}] + jobs)
+    db.session.commit()
+
+    assert again == [ids[0]] + ids
+    assert JobPosting.query.count() == 2
+    posting = db.session.get(JobPosting, ids[0])
+    assert posting.title == "Dev v2" and posting.skills == "python"  # missing fields keep stored values
+    assert posting.scrape_jobs.count() == 2
+    assert second.postings.count() == 2
+
+
+def test_postings_upsert_statements_compile_for_mysql(app, monkeypatch):
+    from sqlalchemy.dialects import mysql
+    from app import db, postings
+
+    sent = []
+    monkeypatch.setattr(postings, "_dialect", lambda: "mysql")
+    monkeypatch.setattr(db.session, "execute", lambda stmt: sent.append(stmt) or [(7, "h")])
+    ids = postings._upsert_batch([postings._row({"title": "Dev"}, None) | {"url_hash": "h"}])
+    postings._link_batch([{"scrape_job_id": 1, "job_posting_id": 7}])
+
+    upsert, lookup, link = (str(s.compile(dialect=mysql.dialect())) for s in sent)
+    assert ids == {"h": 7}
+    assert "ON DUPLICATE KEY UPDATE" in upsert and "coalesce" in upsert
+    assert lookup.startswith("SELECT") and link.startswith("INSERT IGNORE")
+
+
+def test_completed_results_are_served_compressed_with_etag(client, app):
+    import gzip
+
+    from app.results import final_results_path
+
+    task_id = upload(client).get_json()["task_id"]
+    first = client.get(f"/task/{task_id}/results", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == "gzip"
+    etag = first.headers["ETag"]
+    body = json.loads(gzip.decompress(first.data))
+    assert len(body["jobs"]) == 5 and body["matching"] == "ok"
+    assert final_results_path(task_id).exists()
+
+    # served from the stored bytes: same ETag, and cursor=0 gets the same document
+    again = client.get(f"/task/{task_id}/results?cursor=0",
+                       headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["ETag"] == etag
+
+    plain = client.get(f"/task/{task_id}/results")
+    assert "Content-Encoding" not in plain.headers and plain.headers["ETag"] != etag
+    assert plain.get_json() == body
+    assert client.get(f"/task/{task_id}/results", headers={"If-None-Match": plain.headers["ETag"]}).status_code == 304
+
+
+def test_sqlite_connections_use_wal_and_busy_timeout(app):
+    from sqlalchemy import text
+
+    from app.config import BaseConfig
+
+    assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    assert db.session.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == BaseConfig.SQLITE_BUSY_TIMEOUT_MS
+
+
+def test_upload_rejected_when_monthly_quota_used(client, app, tmp_path):
+    from app.models import RoleEnum
+
+    app.config["FREE_JOB_MONTHLY"] = 2
+    job = add_job(job_titles="python")
+    db.session.add(ScrapeJob(user_id=job.user_id))
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(job.user_id)
+
+    res = upload(client, content=b"fresh resume")
+    assert res.status_code == 429
+    assert res.get_json()["limit"] == 2
+    assert ScrapeJob.query.count() == 2
+    assert not any(p.is_file() for p in (tmp_path / "uploads").rglob("*"))
+
+    User.query.get(job.user_id).role = RoleEnum.PRO
+    db.session.commit()
+    assert upload(client, content=b"fresh resume").status_code == 202
+
+
+def test_failed_upload_gives_its_quota_slot_back(client, app, monkeypatch):
+    import pytest
+    fakeredis = pytest.importorskip("fakeredis")
+    from app import api, quota, utils
+
+    monkeypatch.setenv("REDIS_URL", "redis://quota-test")
+    utils._redis_clients["redis://quota-test"] = r = fakeredis.FakeRedis()
+    assert upload(client, content=b"resume one").status_code == 202
+    user_id = ScrapeJob.query.one().user_id
+    assert int(r.get(quota.quota_key(user_id))) == 1  # no eager reconcile before the row existed
+
+    def broken_store(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(api, "store_upload", broken_store)
+    with pytest.raises(OSError):
+        upload(client, content=b"resume two")
+    assert int(r.get(quota.quota_key(user_id))) == 1
+
+
+def test_guest_uploads_count_against_the_free_quota(client, app):
+    app.config["FREE_JOB_MONTHLY"] = 1
+    assert upload(client, content=b"resume one").status_code == 202
+    assert upload(client, content=b"resume two").status_code == 429
+    assert ScrapeJob.query.count() == 1
+
+
+def test_guest_identity_is_reused_and_purged(client, app, tmp_path):
+    from app.guests import purge_expired_guests
+
+    first = upload(client, content=b"resume one").get_json()["task_id"]
+    second = upload(client, content=b"resume two").get_json()["task_id"]
+    guest_id = ScrapeJob.query.get(first).user_id
+    assert ScrapeJob.query.get(second).user_id == guest_id
+    assert User.query.filter_by(is_guest=True).count() == 1
+
+    # another browser gets its own guest
+    app.test_client().post("/upload", data={"resume": (io.BytesIO(b"resume three"), "cv.txt")},
+                           content_type="multipart/form-data")
+    assert User.query.filter_by(is_guest=True).count() == 2
+
+    # a short TTL still reuses the guest between uploads
+    app.config["GUEST_TTL_SECONDS"] = 600
+    third = upload(client, content=b"resume four").get_json()["task_id"]
+    assert ScrapeJob.query.get(third).user_id == guest_id
+    app.config["GUEST_TTL_SECONDS"] = 7 * 24 * 3600
+
+    member = add_job()
+    # an old guest with a recent job is still active
+    User.query.get(guest_id).created_at = datetime.utcnow() - timedelta(days=2)
+    db.session.commit()
+    assert purge_expired_guests(batch_size=1, ttl=3600) == 0
+    assert purge_expired_guests(batch_size=1, ttl=-1) == 2
+    assert User.query.filter_by(is_guest=True).count() == 0
+    assert ScrapeJob.query.all() == [member]
+    assert not (tmp_path / "outputs" / f"result_{first}.ndjson").exists()
+
+
+def test_retention_sweep_deletes_expired_files_in_batches(app, tmp_path):
+    import os
+    import time
+
+    from app.retention import sweep
+
+    uploads, outputs = tmp_path / "uploads", tmp_path / "outputs"
+    old = time.time() - 8 * 24 * 3600
+    files = {
+        uploads / "ab" / "old.pdf": old,
+        uploads / "cd" / "new.pdf": None,
+        outputs / "result_1.ndjson": old,
+        outputs / "result_2.ndjson": None,
+    }
+    for path, mtime in files.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * 10)
+        if mtime:
+            os.utime(path, (mtime, mtime))
+
+    out = app.test_cli_runner().invoke(args=["sweep-retention", "--dry-run"])
+    assert "'expired': 1, 'deleted': 0" in out.output
+    assert all(path.exists() for path in files)
+
+    app.config["RESULT_RETENTION_SECONDS"] = 7 * 24 * 3600
+    out = app.test_cli_runner().invoke(args=["sweep-retention"])
+    assert out.output.count("'deleted': 1") == 2
+    assert sorted(p.name for p in files if p.exists()) == ["new.pdf", "result_2.ndjson"]
+
+    for i in range(5):
+        (uploads / f"batch{i}").write_bytes(b"y")
+        os.utime(uploads / f"batch{i}", (old, old))
+    assert sweep(str(uploads), 3600, batch_size=2) == {"expired": 5, "deleted": 5, "bytes": 5, "errors": 0}
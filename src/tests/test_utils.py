@@ -0,0 +1,538 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from app import fetch as fetch_mod
+from app.scraper import DriverPool, fetch_page, parse_listings, scrape_pages
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_driver_pool_reuses_warm_driver():
+    pool = DriverPool(max_size=1, max_pages=10, factory=FakeDriver)
+    with pool.driver() as first:
+        assert pool.stats()["in_use"] == 1
+    with pool.driver() as second:
+        pass
+    assert first is second
+    assert pool.stats()["hits"] == 1
+    assert pool.stats()["misses"] == 1
+    assert pool.stats()["hit_rate"] == 0.5 and pool.stats()["in_use"] == 0
+
+
+def test_driver_pool_recycles_after_max_pages_and_crash():
+    pool = DriverPool(max_size=1, max_pages=2, factory=FakeDriver)
+    with pool.driver() as d1:
+        pass
+    with pool.driver():
+        pass
+    assert d1.quit_called
+
+    with pytest.raises(WebDriverException):
+        with pool.driver() as d2:
+            raise WebDriverException("tab crashed")
+    assert d2.quit_called
+    assert pool.stats()["recycles"] == 2
+    assert pool.stats()["idle"] == 0
+
+
+def test_driver_pool_close_quits_checked_out_drivers():
+    pool = DriverPool(max_size=2, factory=FakeDriver)
+    with pool.driver() as idle:
+        pass
+    with pool.driver() as busy:
+        pool.close()
+        assert idle.quit_called and busy.quit_called
+    assert pool.stats()["idle"] == 0
+
+
+LISTING_HTML = """<html><head>
+<script type="application/ld+json">%s</script>
+</head><body><article><h2>Ignored when JSON-LD exists</h2></article></body></html>
+""" % json.dumps([
+    {"@type": "JobPosting", "title": "Python Developer", "url": "https://example.com/1",
+     "hiringOrganization": {"name": "Acme"},
+     "jobLocation": {"address": {"addressLocality": "Bangalore"}}},
+    {"@type": "JobPosting", "title": "Data Engineer", "url": "https://example.com/2"},
+])
+
+
+def serve(handle):
+    """
+    Run a local fixture server; `handle(path, headers)` returns (status, headers, body).
+    POST requests call `handle(path, headers, request_body)`.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._reply(*handle(self.path, self.headers))
+
+        def do_POST(self):
+            request_body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._reply(*handle(self.path, self.headers, request_body))
+
+        def _reply(self, status, headers, body):
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StubChatClient:
+    """In-process stand-in for the OpenAI client: scores each posting with `score(ref)`, records the titles sent."""
+
+    def __init__(self, score):
+        self.score = score
+        self.sent = []
+        self.chat = self.completions = self
+
+    def create(self, model, messages, **kwargs):
+        batch = json.loads(messages[1]["content"].rsplit("\n", 1)[-1])
+        self.sent.extend(item["title"] for item in batch)
+        content = json.dumps([{"ref": item["ref"], "score": self.score(item["ref"])} for item in batch])
+        message = type("M", (), {"content": content})
+        return type("R", (), {"choices": [type("C", (), {"message": message})]})
+
+
+@pytest.fixture
+def fixture_server():
+    """Listing page that supports ETag revalidation."""
+    hits = []
+
+    def handle(path, headers):
+        hits.append(headers.get("If-None-Match"))
+        if headers.get("If-None-Match") == '"v1"':
+            return 304, {}, b""
+        return 200, {"Content-Type": "text/html", "ETag": '"v1"'}, LISTING_HTML.encode()
+
+    server = serve(handle)
+    yield f"http://127.0.0.1:{server.server_port}", hits
+    server.shutdown()
+
+
+def test_fetch_page_over_http_uses_conditional_requests(fixture_server):
+    base, hits = fixture_server
+    url = f"{base}/jobs?q=python"
+    first = fetch_page(url)
+    second = fetch_page(url)
+    assert first == second
+    assert hits == [None, '"v1"']
+    assert fetch_mod.get_http_session() is fetch_mod.get_http_session()
+
+
+def test_validator_cache_is_bounded_by_bytes():
+    cache = fetch_mod._ValidatorCache(max_entries=10, max_bytes=10)
+    cache.put("a", '"1"', None, "x" * 4)
+    cache.put("b", '"1"', None, "x" * 4)
+    cache.put("a", '"2"', None, "x" * 4)
+    cache.put("c", '"1"', None, "x" * 4)
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == '"2"' and cache.get("c")
+    cache.put("big", '"1"', None, "x" * 11)
+    assert cache.get("big") is None and cache.bytes == 8
+
+
+def test_parse_listings_prefers_json_ld():
+    jobs = parse_listings(LISTING_HTML, "naukri")
+    assert [j["title"] for j in jobs] == ["Python Developer", "Data Engineer"]
+    assert jobs[0]["company"] == "Acme"
+    assert jobs[0]["location"] == "Bangalore"
+    assert parse_listings("<article><h2>Backend Engineer</h2><p>Acme</p></article>", "x") == [
+        {"title": "Backend Engineer", "source": "x"}
+    ]
+
+
+def test_third_party_markup_is_stored_as_text():
+    from app.scraper import SOURCES
+
+    body = json.dumps([
+        {"legal": "notice"},
+        {"position": "<b>Go</b> Developer", "company": "Acme", "url": "https://remoteok.com/1",
+         "description": "<p>Build APIs &amp; tools</p><script>alert(1)</script><img src=x onerror=alert(1)>"},
+    ])
+    [job] = SOURCES["remoteok"].parse(body)
+    assert job["title"] == "Go Developer"
+    assert job["description"] == "Build APIs & tools"
+
+
+def test_scrape_pages_runs_concurrently_and_stops_on_empty_page():
+    def handle(path, headers):
+        time.sleep(0.3)
+        page = int(path.rsplit("/", 1)[1])
+        if page > 3:
+            return 200, {}, b"<html></html>"
+        body = "".join(f"<article><h2>Job {page}-{n}</h2></article>" for n in range(2))
+        return 200, {}, body.encode()
+
+    server = serve(handle)
+    base = f"http://127.0.0.1:{server.server_port}/jobs"
+    try:
+        started = time.monotonic()
+        jobs = scrape_pages([f"{base}/{p}" for p in range(1, 7)], "fixture", concurrency=6, delay=0)
+        elapsed = time.monotonic() - started
+    finally:
+        server.shutdown()
+    assert [j["title"] for j in jobs] == ["Job 1-0", "Job 1-1", "Job 2-0", "Job 2-1", "Job 3-0", "Job 3-1"]
+    assert elapsed < 1.0
+
+
+def test_scrape_pages_retries_only_the_failing_page(monkeypatch):
+    from app import resilience
+
+    monkeypatch.setattr(resilience, "BACKOFF_START", 0.05)
+    hits = []
+
+    def handle(path, headers):
+        hits.append(path)
+        if path == "/jobs/2" and hits.count(path) == 1:
+            return 503, {"Retry-After": "0"}, b""
+        if path == "/jobs/3":
+            return 200, {}, b"<html></html>"
+        return 200, {}, f"<article><h2>Job {path[-1]}</h2></article>".encode()
+
+    server = serve(handle)
+    base = f"http://127.0.0.1:{server.server_port}/jobs"
+    try:
+        jobs = scrape_pages([f"{base}/{p}" for p in (1, 2, 3)], "retry-fixture", delay=0)
+    finally:
+        server.shutdown()
+    assert [j["title"] for j in jobs] == ["Job 1", "Job 2"]
+    assert hits.count("/jobs/1") == 1 and hits.count("/jobs/2") == 2
+    assert resilience.get_breaker("retry-fixture").state == "closed"
+
+
+def test_circuit_breaker_fails_fast_then_recovers():
+    from app.resilience import CircuitBreaker, CircuitOpen
+
+    breaker = CircuitBreaker("board", failures=2, cooldown=30)
+    breaker.check(now=0)
+    breaker.failure(now=1)
+    breaker.failure(now=2)
+    with pytest.raises(CircuitOpen):
+        breaker.check(now=10)
+
+    breaker.check(now=33)  # cooldown over: one trial goes out
+    with pytest.raises(CircuitOpen):
+        breaker.check(now=33)
+    breaker.failure(now=34)  # trial failed, open again
+    with pytest.raises(CircuitOpen):
+        breaker.check(now=40)
+
+    breaker.check(now=65)
+    breaker.abandon()  # the trial hit a local error: it proves nothing, another trial may go
+    assert breaker.state == "half-open"
+    breaker.check(now=65)
+    breaker.success()
+    assert breaker.state == "closed"
+    breaker.check(now=66)
+
+
+def test_rate_limiter_backs_off_and_recovers(monkeypatch):
+    from app import resilience
+
+    monkeypatch.setattr(resilience, "BACKOFF_START", 1.0)
+    limiter = resilience.RateLimiter("example.com")
+    assert limiter.reserve(0.5, now=0) == 0
+    assert limiter.reserve(0.5, now=0) == 0.5
+
+    limiter.failure(retry_after=5, now=1)
+    assert limiter.reserve(0.5, now=1) == 5  # Retry-After wins over the 1s backoff
+    limiter.failure(now=6)
+    assert limiter.backoff == 2
+    for _ in range(2):
+        limiter.success()
+    assert limiter.backoff == 0
+
+
+def test_enabled_sources_and_merge(monkeypatch):
+    from app.results import dedupe_postings
+    from app.scraper import enabled_sources
+
+    monkeypatch.setenv("SCRAPER_SOURCES", "remoteok, naukri, nosuchboard")
+    assert enabled_sources() == ["naukri", "remoteok"]
+
+    merged = dedupe_postings([
+        {"title": "A", "url": "u1"}, {"title": "B", "url": "u2"},
+        {"title": "A again", "url": "u1"}, {"title": "C", "url": "u3"},
+    ])
+    assert [j["url"] for j in merged] == ["u1", "u2", "u3"]
+
+
+def test_ttl_cache_disk_fallback_expires_and_evicts(tmp_path, monkeypatch):
+    from app.cache import TTLCache
+
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    cache = TTLCache("t", ttl=60, max_bytes=400, cache_dir=tmp_path)
+    cache.set("a", {"jobs": ["x" * 100]})
+    assert cache.get("a") == {"jobs": ["x" * 100]}
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    for key in "bcde":
+        time.sleep(0.01)
+        cache.set(key, {"jobs": ["x" * 100]})
+    assert cache.get("a") is None  # oldest entry evicted to stay under max_bytes
+    assert cache.get("e") is not None
+
+    expired = TTLCache("t2", ttl=-1, max_bytes=400, cache_dir=tmp_path)
+    expired.set("a", [1])
+    assert expired.get("a") is None
+
+
+def test_ttl_cache_redis_keeps_running_total_and_evicts():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis needs it for EVAL
+    from app import utils
+    from app.cache import TTLCache
+
+    utils._redis_clients["redis://cache-test"] = r = fakeredis.FakeRedis()
+    cache = TTLCache("t", ttl=60, max_bytes=400, redis_url="redis://cache-test")
+    cache.set_many({k: {"jobs": ["x" * 100]} for k in "abc"})
+    assert [v is not None for v in cache.get_many("abc")] == [True] * 3
+    cache.set("a", {"jobs": ["x" * 100]})  # rewrite doesn't double count
+    assert int(r.get("t:__bytes")) == 3 * len('{"jobs":["' + "x" * 100 + '"]}')
+
+    cache.set("d", {"jobs": ["x" * 100]})
+    assert cache.get("b") is None  # oldest entry evicted to stay under max_bytes
+    assert int(r.get("t:__bytes")) == sum(int(v) for v in r.hvals("t:__sizes")) <= 400
+
+
+def test_scrape_pages_serves_cached_pages_without_fetching(tmp_path, monkeypatch):
+    from app import cache as cache_mod
+
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(cache_mod, "_scrape_cache", cache_mod.TTLCache("scrape", 60, 10**6, cache_dir=tmp_path))
+    hits = []
+
+    def handle(path, headers):
+        hits.append(path)
+        return 200, {}, b"<article><h2>Python Developer</h2></article>"
+
+    server = serve(handle)
+    url = f"http://127.0.0.1:{server.server_port}/jobs"
+    keys = [cache_mod.scrape_cache_key("fixture", " Python  Developer", "Bangalore", 1)]
+    try:
+        first = scrape_pages([url], "fixture", delay=0, cache_keys=keys)
+        again = scrape_pages([url], "fixture", delay=0,
+                             cache_keys=[cache_mod.scrape_cache_key("fixture", "python developer", "bangalore ", 1)])
+    finally:
+        server.shutdown()
+    assert first == again
+    assert len(hits) == 1
+
+
+def test_store_upload_is_content_addressed(tmp_path):
+    import hashlib
+    import io
+
+    from app.resume_store import ResumeTooLarge, store_upload
+
+    body = b"resume" * 50000  # spans several chunks
+    first = store_upload(io.BytesIO(body), "pdf", tmp_path, 10**6)
+    second = store_upload(io.BytesIO(body), "pdf", tmp_path, 10**6)
+    assert first.digest == second.digest == hashlib.sha256(body).hexdigest()
+    assert first.path == second.path
+    assert first.hash_with(b"python:pune") == hashlib.sha256(body + b"python:pune").hexdigest()
+    assert len([p for p in tmp_path.rglob("*.pdf")]) == 1
+    assert not any((tmp_path / "tmp").iterdir())
+
+    with pytest.raises(ResumeTooLarge):
+        store_upload(io.BytesIO(body), "pdf", tmp_path, 1000)
+
+
+def test_extract_text_from_docx(tmp_path):
+    import zipfile
+
+    from app.resume_parser import extract_text, find_skills
+
+    ns = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    xml = (f'<w:document xmlns:w="{ns}"><w:body>'
+           '<w:p><w:r><w:t>Data Engineer</w:t></w:r></w:p>'
+           '<w:p><w:r><w:t>Spark, Kafka and </w:t></w:r><w:r><w:t>C++</w:t></w:r></w:p>'
+           '</w:body></w:document>')
+    path = tmp_path / "cv.docx"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", xml)
+    text = extract_text(str(path))
+    assert text.splitlines() == ["Data Engineer", "Spark, Kafka and C++"]
+    assert find_skills(text) == ["c++", "spark", "kafka"]
+    assert find_skills("golang, going, cargo") == ["go"]
+
+
+def test_match_jobs_batches_and_keeps_partial_results():
+    from openai import OpenAI
+
+    from app.matching import match_jobs
+
+    jobs = [{"title": f"Job {i}", "url": f"https://example.com/{i}", "description": "python " * 100}
+            for i in range(12)]
+    seen_batches = []
+
+    def handle(path, headers, body):
+        # OpenAI-compatible stub: scores every job by its ref, fails the batch holding ref 0
+        batch = json.loads(json.loads(body)["messages"][1]["content"].rsplit("\n", 1)[-1])
+        seen_batches.append([item["ref"] for item in batch])
+        if any(item["ref"] == 0 for item in batch):
+            return 500, {"Content-Type": "application/json"}, b'{"error": {"message": "boom"}}'
+        content = json.dumps({"matches": [{"ref": item["ref"], "score": item["ref"] * 5} for item in batch]})
+        reply = {"id": "x", "object": "chat.completion", "created": 0, "model": "stub",
+                 "choices": [{"index": 0, "finish_reason": "stop",
+                              "message": {"role": "assistant", "content": content}}]}
+        return 200, {"Content-Type": "application/json"}, json.dumps(reply).encode()
+
+    server = serve(handle)
+    try:
+        client = OpenAI(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0)
+        outcome = match_jobs(client, "stub", {"skills": ["python"]}, jobs, budget_tokens=800, max_in_flight=3)
+    finally:
+        server.shutdown()
+
+    assert outcome["batches"] == len(seen_batches) > 1
+    assert outcome["failed_batches"] == 1
+    failed = next(b for b in seen_batches if 0 in b)
+    refs = [m["ref"] for m in outcome["results"]]
+    assert sorted(refs) == [r for r in range(12) if r not in failed]
+    assert refs == sorted(refs, reverse=True)  # ranked by score
+    assert outcome["results"][0]["url"] == "https://example.com/11"
+
+
+def test_match_cache_only_sends_misses(tmp_path):
+    from app.cache import TTLCache
+    from app.matching import match_jobs
+
+    cache = TTLCache("match", ttl=60, max_bytes=10**6, cache_dir=tmp_path)
+    resume = {"hash": "abc", "skills": ["python"]}
+    jobs = [{"title": "Backend Dev", "company": "Acme", "url": "https://a/1"},
+            {"title": "Data Eng", "company": "Beta", "url": "https://a/2"}]
+    client = StubChatClient(lambda ref: 70)
+    assert match_jobs(client, "m", resume, jobs, cache=cache)["cached"] == 0
+
+    # same postings (re-scraped under another url, different whitespace/case) plus one new one
+    again = [{"title": "backend  dev", "company": "ACME", "url": "https://b/1"}, jobs[1],
+             {"title": "ML Eng", "company": "Gamma", "url": "https://a/3"}]
+    outcome = match_jobs(client, "m", resume, again, cache=cache)
+    assert client.sent == ["Backend Dev", "Data Eng", "ML Eng"]
+    assert outcome["cached"] == 2
+    assert sorted(m["url"] for m in outcome["results"]) == ["https://a/2", "https://a/3", "https://b/1"]
+    assert cache.stats()["hit_rate"] == 0.4
+
+    match_jobs(client, "other-model", resume, jobs[:1], cache=cache)
+    assert client.sent[-1] == "Backend Dev"
+
+    # same resume file, different skills typed into the form: a different prompt, so no reuse
+    match_jobs(client, "m", dict(resume, skills=["python", "go"]), jobs[1:], cache=cache)
+    assert client.sent[-1] == "Data Eng"
+
+
+def test_rank_and_match_forwards_only_top_k():
+    from app.matching import rank_and_match
+    from app.ranking import local_scores
+
+    resume = {"skills": ["python", "django", "aws"], "titles": ["Senior Python Developer"], "summary": ""}
+    jobs = [{"title": "Java Architect", "description": "java spring microservices", "url": "u0"},
+            {"title": "Python Developer", "description": "python django aws rest apis", "url": "u1"},
+            {"title": "Accountant", "description": "ledgers and tax filings", "url": "u2"},
+            {"title": "Python Data Engineer", "description": "python spark airflow", "url": "u3"}]
+    scores = local_scores(resume, jobs)
+    assert scores.shape == (4,)
+    assert scores[1] > scores[3] > scores[0] >= scores[2]
+
+    # no client: full local ranking, nothing forwarded
+    outcome = rank_and_match(None, "m", resume, jobs, top_k=2)
+    assert [m["url"] for m in outcome["results"]] == ["u1", "u3", "u0", "u2"]
+    assert outcome["forwarded"] == 0 and {m["scored_by"] for m in outcome["results"]} == {"local"}
+
+    client = StubChatClient(lambda ref: 90 - ref)
+    outcome = rank_and_match(client, "m", resume, jobs, top_k=2)
+    assert sorted(client.sent) == ["Python Data Engineer", "Python Developer"]
+    assert [(m["url"], m["scored_by"]) for m in outcome["results"]] == [
+        ("u1", "llm"), ("u3", "llm"), ("u0", "local"), ("u2", "local")]
+    assert outcome["results"][0]["local_score"] == float(scores[1])
+
+
+def test_skill_index_matches_and_gaps():
+    from app.skills import SkillIndex, find_skills, to_mask
+
+    assert find_skills("Spring Boot, NodeJS and k8s; some JS") == ["javascript", "spring", "node.js", "kubernetes"]
+    assert to_mask(["Postgres"]) == to_mask(["postgresql"]) != 0
+    # everyday words only count as skills in a tech context
+    assert find_skills("A go-getter, ready to go. Go team! Node of a graph, this spring") == []
+    assert find_skills("Services in Go") == ["go"]
+    assert find_skills("Skills: go, docker, node") == ["go", "node.js", "docker"]
+
+    index = SkillIndex.from_jobs([
+        {"skills": ["python", "django", "aws"]},
+        {"title": "Go developer", "description": "Go, Kubernetes and AWS"},
+        {"skills": ["python", "kubernetes"]},
+    ])
+    assert index.compare(["python", "aws"]) == [
+        (["python", "aws"], ["django"]),
+        (["aws"], ["go", "kubernetes"]),
+        (["python"], ["kubernetes"]),
+    ]
+    assert index.count("aws") == 2
+    assert index.top_gaps(["python", "aws"]) == [
+        {"skill": "kubernetes", "postings": 2}, {"skill": "go", "postings": 1}, {"skill": "django", "postings": 1}]
+
+
+def test_codec_matches_stdlib_and_round_trips_celery_messages(app):
+    import datetime
+
+    from kombu.serialization import dumps as kombu_dumps, loads as kombu_loads
+
+    from app import codec
+
+    job = {"title": "Développeur Python", "skills": ["python", "django"], "score": 87.5, "remote": True,
+           "salary": None, "ref": 3}
+    assert codec.dumps(job) == json.dumps(job, separators=(",", ":"), ensure_ascii=False).encode()
+    assert codec.loads(codec.dumps([job])) == [job]
+    assert codec.dumps({"at": datetime.date(2026, 1, 2), "tags": {"a"}}) == b'{"at":"2026-01-02","tags":["a"]}'
+
+    content_type, encoding, payload = kombu_dumps(((1, "python"), {"resume": job}, {}), serializer="fastjson")
+    assert content_type == codec.CELERY_CONTENT_TYPE
+    assert kombu_loads(payload, content_type, encoding) == [[1, "python"], {"resume": job}, {}]
+
+    assert app.json.loads(app.json.dumps(job)) == job
+    assert "\n" in app.json.dumps(job, indent=2)
+
+
+def test_job_events_only_carry_public_fields():
+    from app.events import sse
+
+    event = sse({"status": "completed", "progress": 100, "results_path": "/srv/outputs/result_1.ndjson",
+                 "skills": "python"})
+    assert json.loads(event[len("data: "):]) == {"status": "completed", "progress": 100}
+
+
+def test_concurrent_compressed_writes_never_publish_partial_files(tmp_path):
+    import gzip
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.results import compress, read_compressed, write_compressed
+
+    path = tmp_path / "result_1.json.gz"
+    bodies = [compress(b'{"jobs":[%d]}' % n * 2000) for n in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda body: write_compressed(path, body), bodies * 4))
+    assert read_compressed(path) in bodies
+    gzip.decompress(read_compressed(path))
+    assert [p.name for p in tmp_path.iterdir()] == ["result_1.json.gz"]